@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Awaitable
+from fastapi import HTTPException, Request
+
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[Any]) -> Any:
+    """Await `awaitable`, cancelling it if the client goes away first"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # 499: client closed request (nginx convention)
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -1,70 +1,228 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.api.cancellation import cancel_on_disconnect
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from typing import Optional, Literal
 from app.schemas.prediction import (
     PricePrediction, 
     TechnicalAnalysis, 
-    CombinedAnalysis
+    CombinedAnalysis,
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    IndicatorsResponse,
+    AccuracyReport
 )
 from app.services.ml_prediction import MLPredictionService
 
 router = APIRouter()
+ForecastModel = Literal["prophet", "linear", "damped"]
 ml_service = MLPredictionService()
 
 @router.get("/predict/{symbol}", response_model=PricePrediction)
 async def predict_stock_price(
+    request: Request,
     symbol: str,
-    days: Optional[int] = Query(7, ge=1, le=30, description="Number of days to predict")
+    days: Optional[int] = Query(7, ge=1, le=30, description="Number of days to predict"),
+    model: ForecastModel = Query("prophet", description="Forecasting engine")
 ):
     """
-    Predict stock prices using Prophet ML model
+    Predict stock prices using Prophet ML model or a lightweight engine
     
     - **symbol**: Stock symbol (e.g., AAPL, MSFT)
     - **days**: Number of days to predict (1-30, default: 7)
+    - **model**: `prophet` (default), `linear` (OLS on log prices) or `damped` (damped trend smoothing)
     
     Returns price predictions with confidence intervals
     """
     try:
-        result = ml_service.predict_stock_price(symbol.upper(), days)
+        result = await cancel_on_disconnect(request, ml_service.predict_stock_price(symbol.upper(), days, model=model))
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (ServiceBusyError, HTTPException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error predicting stock: {str(e)}")
 
+@router.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_stock_prices(request: Request, body: BatchPredictionRequest):
+    """
+    Predict prices for many stocks in one request
+    
+    - **symbols**: Stock symbols (up to 50)
+    - **days**: Number of days to predict (1-30, default: 7)
+    
+    Models are fitted in parallel; symbols that fail are listed in `errors`
+    """
+    try:
+        return await cancel_on_disconnect(request, ml_service.predict_many(body.symbols, body.days))
+    except (ServiceBusyError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting stocks: {str(e)}")
+
+@router.get("/indicators", response_model=IndicatorsResponse)
+async def get_indicators(
+    symbols: str = Query(..., description="Comma-separated stock symbols (e.g., AAPL,MSFT)")
+):
+    """
+    Get the latest technical indicators for many stocks
+    
+    - **symbols**: Comma-separated stock symbols
+    
+    Returns RSI, MACD, SMA/EMA, Bollinger Bands, ATR, stochastic and OBV per symbol
+    """
+    symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(symbol_list) > settings.INDICATOR_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.INDICATOR_MAX_SYMBOLS} symbols per request"
+        )
+    
+    try:
+        return await ml_service.get_indicators(symbol_list)
+    except ServiceBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating indicators: {str(e)}")
+
 @router.get("/signals/{symbol}", response_model=TechnicalAnalysis)
-async def get_technical_signals(symbol: str):
+async def get_technical_signals(
+    symbol: str,
+    live: bool = Query(False, description="Evaluate indicators at the current quote")
+):
     """
     Get technical indicators and trading signals
     
     - **symbol**: Stock symbol (e.g., AAPL, MSFT)
+    - **live**: Evaluate RSI/MACD at the current quote instead of the last close
     
     Returns RSI, MACD, signals, and recommendation
     """
     try:
-        result = ml_service.get_technical_signals(symbol.upper())
+        result = await ml_service.get_technical_signals(symbol.upper(), live=live)
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (ServiceBusyError, HTTPException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating signals: {str(e)}")
 
 @router.get("/analyze/{symbol}", response_model=CombinedAnalysis)
 async def get_combined_analysis(
+    request: Request,
     symbol: str,
-    days: Optional[int] = Query(7, ge=1, le=30, description="Number of days to predict")
+    days: Optional[int] = Query(7, ge=1, le=30, description="Number of days to predict"),
+    model: ForecastModel = Query("prophet", description="Forecasting engine")
 ):
     """
     Get comprehensive analysis: predictions + technical signals
     
     - **symbol**: Stock symbol (e.g., AAPL, MSFT)
     - **days**: Number of days to predict (1-30, default: 7)
+    - **model**: `prophet` (default), `linear` or `damped`
     
     Returns complete analysis with final recommendation
     """
     try:
-        result = ml_service.get_combined_analysis(symbol.upper(), days)
+        result = await cancel_on_disconnect(request, ml_service.get_combined_analysis(symbol.upper(), days, model=model))
         return result
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except (ServiceBusyError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error in analysis: {str(e)}")
+
+@router.get("/analyze/{symbol}/stream")
+async def stream_combined_analysis(
+    request: Request,
+    symbol: str,
+    days: Optional[int] = Query(7, ge=1, le=30, description="Number of days to predict"),
+    model: ForecastModel = Query("prophet", description="Forecasting engine"),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="`ndjson` lines or Server-Sent Events")
+):
+    """
+    Stream the combined analysis in stages
+    
+    Emits `signals` (technical indicators, available right after the history
+    fetch), then `prediction` (once the model finishes), then
+    `recommendation` (final recommendation, confidence and reasons). As
+    NDJSON each line is `{"event": ..., "data": ...}`; as SSE each stage is
+    one named event. A failure after the first stage is sent as an `error`
+    event.
+    """
+    events = ml_service.stream_combined_analysis(symbol.upper(), days, model=model)
+    
+    # Wait for the first stage here so lookup errors still get a status code
+    try:
+        first = await cancel_on_disconnect(request, events.__anext__())
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ServiceBusyError, HTTPException):
+        await events.aclose()
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in analysis: {str(e)}")
+    
+    def encode(event: str, data) -> str:
+        if format == "sse":
+            return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+        return json.dumps(jsonable_encoder({"event": event, "data": data})) + "\n"
+    
+    async def body():
+        try:
+            yield encode(*first)
+            async for event, data in events:
+                yield encode(event, data)
+        except Exception as e:
+            print(f"Error streaming analysis for {symbol}: {e}")
+            yield encode("error", {"detail": str(e)})
+        finally:
+            await events.aclose()
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@router.post("/evaluate/{symbol}", response_model=AccuracyReport)
+async def evaluate_accuracy(
+    request: Request,
+    symbol: str,
+    model: ForecastModel = Query("prophet", description="Forecasting engine"),
+    folds: int = Query(12, ge=1, le=52, description="Walk-forward cutoffs")
+):
+    """
+    Run a walk-forward accuracy evaluation of a forecaster
+    
+    - **symbol**: Stock symbol (e.g., AAPL, MSFT)
+    - **model**: Forecasting engine (prophet, linear or damped)
+    - **folds**: Number of rolling cutoffs (1-52, default: 12)
+    
+    Returns MAPE, RMSE and interval coverage per horizon; the result is stored
+    and attached to later predictions as `accuracy`
+    """
+    try:
+        return await cancel_on_disconnect(request, ml_service.evaluate_accuracy(symbol.upper(), model, folds))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ServiceBusyError, HTTPException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error evaluating forecasts: {str(e)}")
+
+@router.get("/accuracy/{symbol}", response_model=AccuracyReport)
+async def get_accuracy(
+    symbol: str,
+    model: ForecastModel = Query("prophet", description="Forecasting engine")
+):
+    """Get the latest stored walk-forward evaluation for a symbol"""
+    try:
+        return ml_service.get_accuracy(symbol.upper(), model)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,36 +1,82 @@
-from fastapi import APIRouter
-from app.services.stock_screener import StockScreenerService
-from app.schemas.screener import ScreenerResponse, TopMoversResponse
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional, Literal
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.services.screener_index import screener_index
+from app.services.screener_refresher import screener_refresher
+from app.schemas.screener import (
+    ScreenerResponse,
+    TopMoversResponse,
+    TechnicalScreenResponse,
+    ScreenerQueryResponse
+)
 
 router = APIRouter()
-screener_service = StockScreenerService()
+screener_service = screener_refresher.service
 
 @router.get("/undervalued", response_model=ScreenerResponse)
 async def get_undervalued_stocks():
     """Get stocks that appear undervalued based on various metrics"""
-    stocks = screener_service.get_undervalued_stocks()
-    return {
-        "category": "undervalued",
-        "stocks": stocks,
-        "count": len(stocks)
-    }
+    return await screener_refresher.get("undervalued")
 
 @router.get("/gainers", response_model=TopMoversResponse)
 async def get_top_gainers():
     """Get top gaining stocks today"""
-    stocks = screener_service.get_top_gainers()
-    return {
-        "category": "gainers",
-        "stocks": stocks,
-        "count": len(stocks)
-    }
+    return await screener_refresher.get("gainers")
 
 @router.get("/losers", response_model=TopMoversResponse)
 async def get_top_losers():
     """Get top losing stocks today"""
-    stocks = screener_service.get_top_losers()
-    return {
-        "category": "losers",
-        "stocks": stocks,
-        "count": len(stocks)
-    }
+    return await screener_refresher.get("losers")
+
+@router.get("/technical", response_model=TechnicalScreenResponse)
+async def get_technical_screen(
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (default: screener universe)"),
+    rsi_min: Optional[float] = Query(None, ge=0, le=100, description="Minimum RSI"),
+    rsi_max: Optional[float] = Query(None, ge=0, le=100, description="Maximum RSI"),
+    macd: Optional[Literal["bullish", "bearish"]] = Query(None, description="MACD histogram direction"),
+    bollinger: Optional[Literal["above_upper", "below_lower"]] = Query(None, description="Close outside a Bollinger Band")
+):
+    """Get stocks matching technical indicator filters"""
+    symbol_list = None
+    if symbols:
+        symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+        if len(symbol_list) > settings.INDICATOR_MAX_SYMBOLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.INDICATOR_MAX_SYMBOLS} symbols per request"
+            )
+    
+    try:
+        stocks = await screener_service.get_technical_screen(
+            symbol_list, rsi_min=rsi_min, rsi_max=rsi_max, macd=macd, bollinger=bollinger
+        )
+    except ServiceBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error screening stocks: {str(e)}")
+    return {"category": "technical", "stocks": stocks, "count": len(stocks)}
+
+@router.get("/query", response_model=ScreenerQueryResponse)
+async def query_screener(
+    q: str = Query("", description='Filter expression, e.g. peRatio<20 & upside>15 sort=-changePercent'),
+    sort: Optional[str] = Query(None, description="Comma-separated sort keys, '-' for descending"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum stocks returned")
+):
+    """
+    Screen the whole listed universe with a filter expression
+    
+    Comparisons (`<`, `<=`, `>`, `>=`, `==`, `!=`) on any index column combine
+    with `&`, `|`, `!` and parentheses; `sort=` and `limit=` may be part of `q`.
+    """
+    try:
+        await screener_index.ensure_loaded()
+    except ServiceBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Screener index unavailable: {str(e)}")
+    
+    try:
+        return screener_index.query(q, sort=sort, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
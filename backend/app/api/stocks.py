@@ -1,17 +1,39 @@
-from fastapi import APIRouter, HTTPException
-from app.services.alpha_vantage import AlphaVantageService
-from app.schemas.stock import StockInfo, StockHistory, StockSearch
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.services.market_data import get_market_data_provider
+from app.services.quote_stream import QuoteSubscriber, quote_hub
+from app.services.symbol_search import symbol_search
+from app.schemas.stock import StockInfo, StockHistory, StockSearch, BatchQuotes
 
 router = APIRouter()
-av_service = AlphaVantageService()
+market_data = get_market_data_provider()
+
+# Comment line sent on idle SSE connections so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _split_symbols(symbols: str):
+    return [symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()]
 
 @router.get("/search/{query}", response_model=StockSearch)
 async def search_stocks(query: str):
-    """Search for stocks by symbol or name"""
+    """Search for stocks by symbol or name
+    
+    Answered from the local listing index; the upstream search is only used
+    when nothing matches locally.
+    """
     try:
-        results = av_service.search_stocks(query)
+        results = symbol_search.search(query, limit=5)
+        if not results:
+            results = await market_data.search_stocks(query)
         results = results[:5]  # Limit to top 5 results
         return {"query": query, "results": results}
+    except ServiceBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -19,8 +41,10 @@ async def search_stocks(query: str):
 async def get_stock_info(symbol: str):
     """Get detailed information about a stock"""
     try:
-        info = av_service.get_stock_info(symbol)
+        info = await market_data.get_stock_info(symbol)
         return info
+    except ServiceBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
 
@@ -31,8 +55,10 @@ async def get_stock_history(symbol: str, period: str = "1mo"):
     Periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
     """
     try:
-        history = av_service.get_stock_history(symbol, period)
+        history = await market_data.get_stock_history(symbol, period)
         return {"symbol": symbol, "period": period, "data": history}
+    except ServiceBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -40,7 +66,126 @@ async def get_stock_history(symbol: str, period: str = "1mo"):
 async def get_stock_quote(symbol: str):
     """Get real-time quote for a stock"""
     try:
-        quote = av_service.get_stock_quote(symbol)
+        quote = await market_data.get_stock_quote(symbol)
         return quote
+    except ServiceBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Stock {symbol} not found")
+
+@router.get("/quotes", response_model=BatchQuotes)
+async def get_stock_quotes(
+    symbols: str = Query(..., description="Comma-separated stock symbols (e.g., AAPL,MSFT)")
+):
+    """Get real-time quotes for many stocks in one request
+    
+    Symbols that could not be quoted are listed in `errors`.
+    """
+    symbol_list = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(symbol_list) > settings.QUOTE_BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTE_BATCH_MAX_SYMBOLS} symbols per request"
+        )
+    
+    try:
+        return await market_data.get_stock_quotes(symbol_list)
+    except ServiceBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stream")
+async def stream_quotes(
+    symbols: str = Query(..., description="Comma-separated stock symbols (e.g., AAPL,MSFT)")
+):
+    """Stream live quotes as Server-Sent Events
+    
+    Each `quotes` event is a JSON list of `{symbol, <changed fields>}`; the
+    first event for a symbol carries the full quote. Upstream polling is
+    shared between all connected clients.
+    """
+    symbol_list = _split_symbols(symbols)
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols provided")
+    if len(symbol_list) > settings.QUOTE_STREAM_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTE_STREAM_MAX_SYMBOLS} symbols per stream"
+        )
+    
+    async def events():
+        subscriber = QuoteSubscriber()
+        quote_hub.subscribe(subscriber, symbol_list)
+        try:
+            while True:
+                try:
+                    updates = await asyncio.wait_for(subscriber.next(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: quotes\ndata: {json.dumps(updates)}\n\n"
+        finally:
+            quote_hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/stream/ws")
+async def stream_quotes_ws(websocket: WebSocket, symbols: str = ""):
+    """Stream live quotes over a WebSocket
+    
+    Symbols from the `symbols` query parameter are subscribed on connect;
+    afterwards the client can send `{"subscribe": [...]}` or
+    `{"unsubscribe": [...]}`. The server sends `{"quotes": [...]}` messages
+    with the changed fields per symbol, or `{"error": ...}`.
+    """
+    await websocket.accept()
+    subscriber = QuoteSubscriber()
+    
+    async def handle(message):
+        if not isinstance(message, dict):
+            await websocket.send_json({"error": "Expected a JSON object"})
+            return
+        for key in ("subscribe", "unsubscribe"):
+            value = message.get(key, [])
+            if not isinstance(value, list) or not all(isinstance(symbol, str) for symbol in value):
+                await websocket.send_json({"error": f"'{key}' must be a list of symbols"})
+                return
+        quote_hub.unsubscribe(subscriber, message.get("unsubscribe", []))
+        wanted = {symbol.strip().upper() for symbol in message.get("subscribe", [])} - subscriber.symbols
+        if len(subscriber.symbols) + len(wanted) > settings.QUOTE_STREAM_MAX_SYMBOLS:
+            await websocket.send_json(
+                {"error": f"At most {settings.QUOTE_STREAM_MAX_SYMBOLS} symbols per stream"}
+            )
+            return
+        quote_hub.subscribe(subscriber, wanted)
+    
+    async def receive():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (json.JSONDecodeError, KeyError):
+                message = None
+            await handle(message)
+    
+    async def send():
+        while True:
+            await websocket.send_json({"quotes": await subscriber.next()})
+    
+    await handle({"subscribe": _split_symbols(symbols)})
+    tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"Error in quote stream: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        quote_hub.unsubscribe(subscriber)
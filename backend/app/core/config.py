@@ -8,6 +8,73 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     ALPHA_VANTAGE_API_KEY: str = "demo"  # Default demo key, replace with your own
     
+    # Upstream quota of the API key (free tier defaults)
+    ALPHA_VANTAGE_CALLS_PER_MINUTE: int = 5
+    ALPHA_VANTAGE_CALLS_PER_DAY: int = 25
+    UPSTREAM_MAX_WAIT_SECONDS: float = 30.0
+    # Share of the daily quota that only interactive requests may use
+    UPSTREAM_INTERACTIVE_RESERVE: float = 0.2
+    ALPHA_VANTAGE_BULK_QUOTES: bool = False  # REALTIME_BULK_QUOTES needs a premium key
+    QUOTE_BATCH_CONCURRENCY: int = 8
+    QUOTE_BATCH_MAX_SYMBOLS: int = 100
+    # Live quote streaming: one upstream poller per subscribed symbol
+    QUOTE_STREAM_INTERVAL: float = 15.0
+    QUOTE_STREAM_MAX_SYMBOLS: int = 50
+    
+    # Market data providers ("alpha_vantage" or "yahoo"); the hedge provider is optional
+    MARKET_DATA_PROVIDER: str = "alpha_vantage"
+    MARKET_DATA_HEDGE_PROVIDER: str = ""
+    HEDGE_MIN_DELAY: float = 0.05
+    HEDGE_MAX_DELAY: float = 2.0
+    HEDGE_MIN_SAMPLES: int = 20
+    HEDGE_LATENCY_WINDOW: int = 200
+    
+    # Screener
+    SCREENER_CONCURRENCY: int = 8
+    SCREENER_SNAPSHOT_TTL: int = 60
+    # Off by default: a free key (25 calls/day) cannot sustain a background sweep
+    SCREENER_PRECOMPUTE: bool = False
+    SCREENER_REFRESH_INTERVAL: int = 300
+    # Symbols per vectorized indicator request
+    INDICATOR_MAX_SYMBOLS: int = 500
+    # Market-wide screener index over the LISTING_STATUS universe
+    # Off by default like the precompute; batch and interval are capped by the daily quota
+    SCREENER_INDEX: bool = False
+    SCREENER_INDEX_REFRESH_INTERVAL: int = 900
+    SCREENER_INDEX_BATCH: int = 25  # Max per-symbol upstream calls per refresh
+    LISTINGS_TTL: int = 24 * 3600
+    
+    # Record/replay of upstream responses: "live", "record" or "replay"
+    UPSTREAM_MODE: str = "live"
+    CASSETTE_DIR: str = ""  # Defaults to <DATA_DIR>/cassettes
+    REPLAY_LATENCY_SCALE: float = 0.0  # Multiplier on the recorded latency
+    REPLAY_LATENCY_MS: float = 0.0
+    REPLAY_JITTER_MS: float = 0.0
+    
+    # Model fitting process pool (0 workers = one per CPU core)
+    MODEL_WORKERS: int = 0
+    MODEL_MAX_PENDING: int = 16
+    MODEL_RETRY_AFTER: int = 5
+    
+    # ML prediction cache
+    ML_CACHE_MAX_ENTRIES: int = 2048
+    ML_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ML_CACHE_TTL: int = 24 * 3600
+    SIGNALS_CACHE_TTL: int = 15 * 60
+    
+    # Shared upstream HTTP client
+    HTTP_TIMEOUT: float = 15.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Local data (bar store, caches)
+    DATA_DIR: str = "data"
+    BAR_REFRESH_DAILY_SECONDS: int = 3600
+    BAR_REFRESH_INTRADAY_SECONDS: int = 300
+    FUNDAMENTALS_TTL: int = 24 * 3600
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,10 @@
+class ServiceBusyError(Exception):
+    """Raised when a request cannot be served right now
+
+    Handled globally in `app.main` as a 503 response with a Retry-After header,
+    so routers should let it propagate instead of wrapping it.
+    """
+    
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
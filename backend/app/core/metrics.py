@@ -0,0 +1,198 @@
+"""
+Prometheus metrics for the API
+
+Everything is exposed at `/metrics` in the Prometheus text format. Requests
+are timed by `MetricsMiddleware`; service code uses the `timed` and
+`track_upstream` decorators or observes the histograms below directly.
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Callable, Dict, Optional
+import httpx
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'API request latency by route template',
+    ['method', 'route', 'status']
+)
+UPSTREAM_CALLS = Counter(
+    'upstream_calls_total', 'Alpha Vantage calls by function and outcome',
+    ['function', 'outcome']
+)
+UPSTREAM_LATENCY = Histogram(
+    'upstream_call_duration_seconds', 'Alpha Vantage call latency by function',
+    ['function']
+)
+MODEL_FIT_SECONDS = Histogram(
+    'model_fit_duration_seconds', 'Forecast model fit time',
+    ['model'], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+MODEL_PREDICT_SECONDS = Histogram(
+    'model_predict_duration_seconds', 'Forecast model predict time',
+    ['model'], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+SCREENER_SWEEP_SECONDS = Histogram(
+    'screener_sweep_duration_seconds', 'Duration of one background screener pass',
+    ['screener'], buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+)
+EVENT_LOOP_LAG = Gauge('event_loop_lag_seconds', 'Latest event loop scheduling delay')
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    'event_loop_lag_distribution_seconds', 'Event loop scheduling delay',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable:
+    """Decorator observing the duration of a function (sync or async) in `histogram`"""
+    metric = histogram.labels(*labels) if labels else histogram
+    
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metric.observe(time.perf_counter() - start)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _upstream_outcome(payload: Any) -> str:
+    # Alpha Vantage reports quota and lookup errors in a 200 response
+    if isinstance(payload, dict):
+        if 'Note' in payload or 'Information' in payload:
+            return 'rate_limited'
+        if 'Error Message' in payload:
+            return 'api_error'
+    return 'ok'
+
+
+def track_upstream(func: Callable) -> Callable:
+    """Decorator for `(self, function, ...)` coroutines that make one upstream call"""
+    @functools.wraps(func)
+    async def wrapper(self, function: str, *args, **kwargs):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            payload = await func(self, function, *args, **kwargs)
+            outcome = _upstream_outcome(payload)
+            return payload
+        except httpx.TimeoutException:
+            outcome = 'timeout'
+            raise
+        except httpx.HTTPStatusError:
+            outcome = 'http_error'
+            raise
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            UPSTREAM_LATENCY.labels(function).observe(time.perf_counter() - start)
+            UPSTREAM_CALLS.labels(function, outcome).inc()
+    return wrapper
+
+
+class CacheCollector:
+    """Exports the counters of registered `LRUCache` instances at scrape time"""
+    
+    def __init__(self):
+        self._caches: Dict[str, Any] = {}
+    
+    def register(self, cache) -> None:
+        self._caches[cache.name] = cache
+    
+    def collect(self):
+        counters = {
+            name: CounterMetricFamily(f'cache_{name}', f'Cache {name}', labels=['cache'])
+            for name in ('hits', 'misses', 'evictions', 'expirations')
+        }
+        entries = GaugeMetricFamily('cache_entries', 'Entries held by the cache', labels=['cache'])
+        size = GaugeMetricFamily('cache_bytes', 'Estimated size of the cache', labels=['cache'])
+        ratio = GaugeMetricFamily('cache_hit_ratio', 'Hits over lookups since start', labels=['cache'])
+        for cache in self._caches.values():
+            stats = cache.stats()
+            for name, family in counters.items():
+                family.add_metric([stats['name']], stats[name])
+            entries.add_metric([stats['name']], stats['entries'])
+            size.add_metric([stats['name']], stats['bytes'])
+            ratio.add_metric([stats['name']], stats['hit_ratio'])
+        yield from counters.values()
+        yield from (entries, size, ratio)
+
+
+cache_collector = CacheCollector()
+REGISTRY.register(cache_collector)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request
+    
+    Requests are labelled with the matched route template (`/api/stocks/quote/{symbol}`),
+    not the raw path, so symbols do not create new series.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        
+        start = time.perf_counter()
+        status = [500]
+        
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            REQUEST_LATENCY.labels(
+                scope['method'], getattr(route, 'path', 'unmatched'), str(status[0])
+            ).observe(time.perf_counter() - start)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up, i.e. how blocked the event loop is"""
+    
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            EVENT_LOOP_LAG.set(lag)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -1,12 +1,42 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.core.http import get_http_client, close_http_client
+from app.core.metrics import MetricsMiddleware, loop_lag_monitor
 from app.api import stocks, screener, predictions
+from app.services.model_executor import model_executor
+from app.services.quote_stream import quote_hub
+from app.services.screener_index import screener_index
+from app.services.screener_refresher import screener_refresher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the shared upstream connection pool once for the whole process
+    get_http_client()
+    loop_lag_monitor.start()
+    model_executor.start()
+    if settings.SCREENER_PRECOMPUTE:
+        screener_refresher.start()
+    if settings.SCREENER_INDEX:
+        screener_index.start()
+    yield
+    await quote_hub.stop()
+    await screener_index.stop()
+    await screener_refresher.stop()
+    model_executor.shutdown()
+    await close_http_client()
+    await loop_lag_monitor.stop()
 
 app = FastAPI(
     title="STK Decider API",
     description="Real-time stock data analysis API with ML predictions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -17,6 +47,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(ServiceBusyError)
+async def service_busy_handler(request: Request, exc: ServiceBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
 
 # Include routers
 app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
@@ -31,6 +70,11 @@ async def root():
         "status": "running"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Passed as a header: media_type would get a second charset appended
+    return Response(generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
+
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
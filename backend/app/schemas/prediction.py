@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from app.schemas.stock import SymbolError
 
 class PricePredictionPoint(BaseModel):
     """Single price prediction point"""
@@ -10,6 +11,19 @@ class PricePredictionPoint(BaseModel):
     upper_bound: float = Field(..., description="Upper confidence bound")
     confidence: float = Field(..., description="Prediction confidence")
 
+class HorizonAccuracy(BaseModel):
+    """Walk-forward accuracy measured at one horizon"""
+    horizon: int = Field(..., description="Days ahead the metrics were measured at")
+    samples: int = Field(..., description="Realized forecasts scored")
+    mape: float = Field(..., description="Mean absolute percentage error (%)")
+    rmse: float = Field(..., description="Root mean squared error")
+    coverage: float = Field(..., description="Share of actual prices inside the confidence interval (0-1)")
+
+class PredictionAccuracy(HorizonAccuracy):
+    """Measured accuracy attached to a prediction"""
+    folds: int = Field(..., description="Walk-forward folds evaluated")
+    evaluated_at: str = Field(..., description="Evaluation timestamp")
+
 class PricePrediction(BaseModel):
     """Stock price prediction response"""
     symbol: str = Field(..., description="Stock symbol")
@@ -21,6 +35,7 @@ class PricePrediction(BaseModel):
     predictions: List[PricePredictionPoint] = Field(..., description="Daily predictions")
     days_predicted: int = Field(..., description="Number of days predicted")
     timestamp: str = Field(..., description="Analysis timestamp")
+    accuracy: Optional[PredictionAccuracy] = Field(None, description="Measured walk-forward accuracy, if evaluated")
 
 class TechnicalSignal(BaseModel):
     """Technical indicator signal"""
@@ -63,3 +78,48 @@ class PredictionRequest(BaseModel):
     """Request for price prediction"""
     symbol: str = Field(..., description="Stock symbol", example="AAPL")
     days: Optional[int] = Field(7, description="Number of days to predict", ge=1, le=30)
+
+class BatchPredictionRequest(BaseModel):
+    """Request for price predictions on many symbols"""
+    symbols: List[str] = Field(..., description="Stock symbols", min_length=1, max_length=50, example=["AAPL", "MSFT"])
+    days: Optional[int] = Field(7, description="Number of days to predict", ge=1, le=30)
+
+class BatchPredictionResponse(BaseModel):
+    """Batch price prediction response"""
+    predictions: List[PricePrediction] = Field(..., description="Successful predictions")
+    errors: List[SymbolError] = Field([], description="Symbols that could not be predicted")
+
+class IndicatorValues(BaseModel):
+    """Latest technical indicator values for one symbol"""
+    symbol: str = Field(..., description="Stock symbol")
+    date: str = Field(..., description="Date of the latest bar")
+    close: Optional[float] = Field(None, description="Latest close")
+    rsi: Optional[float] = Field(None, description="Relative Strength Index (14)")
+    macd: Optional[float] = Field(None, description="MACD line (12, 26)")
+    macd_signal: Optional[float] = Field(None, description="MACD signal line (9)")
+    macd_histogram: Optional[float] = Field(None, description="MACD histogram")
+    sma_20: Optional[float] = Field(None, description="20-day simple moving average")
+    sma_50: Optional[float] = Field(None, description="50-day simple moving average")
+    ema_12: Optional[float] = Field(None, description="12-day exponential moving average")
+    ema_26: Optional[float] = Field(None, description="26-day exponential moving average")
+    bb_upper: Optional[float] = Field(None, description="Upper Bollinger Band (20, 2)")
+    bb_middle: Optional[float] = Field(None, description="Middle Bollinger Band")
+    bb_lower: Optional[float] = Field(None, description="Lower Bollinger Band")
+    atr: Optional[float] = Field(None, description="Average True Range (14)")
+    stoch_k: Optional[float] = Field(None, description="Stochastic %K (14)")
+    stoch_d: Optional[float] = Field(None, description="Stochastic %D (3)")
+    obv: Optional[float] = Field(None, description="On-Balance Volume over the loaded window")
+
+class IndicatorsResponse(BaseModel):
+    """Indicator values for many symbols"""
+    indicators: List[IndicatorValues] = Field(..., description="Latest values per symbol")
+    errors: List[SymbolError] = Field([], description="Symbols without price history")
+
+class AccuracyReport(BaseModel):
+    """Walk-forward evaluation of a forecasting engine for one symbol"""
+    symbol: str = Field(..., description="Stock symbol")
+    model: str = Field(..., description="Forecasting engine")
+    folds: int = Field(..., description="Cutoffs evaluated")
+    step: int = Field(..., description="Bars between cutoffs")
+    evaluated_at: str = Field(..., description="Evaluation timestamp")
+    horizons: List[HorizonAccuracy] = Field(..., description="Metrics per horizon (days ahead)")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
+from app.schemas.prediction import IndicatorValues
 
 class ScreenedStock(BaseModel):
     symbol: str
@@ -35,8 +36,49 @@ class ScreenerResponse(BaseModel):
     category: str
     stocks: List[ScreenedStock]
     count: int
+    updatedAt: Optional[str] = None
+    ageSeconds: Optional[float] = None
 
 class TopMoversResponse(BaseModel):
     category: str
     stocks: List[TopMover]
     count: int
+    updatedAt: Optional[str] = None
+    ageSeconds: Optional[float] = None
+
+class TechnicalScreenResponse(BaseModel):
+    category: str
+    stocks: List[IndicatorValues]
+    count: int
+
+class IndexedStock(BaseModel):
+    symbol: str
+    name: Optional[str] = None
+    exchange: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    price: Optional[float] = None
+    change: Optional[float] = None
+    changePercent: Optional[float] = None
+    volume: Optional[float] = None
+    marketCap: Optional[float] = None
+    peRatio: Optional[float] = None
+    forwardPE: Optional[float] = None
+    pegRatio: Optional[float] = None
+    pbRatio: Optional[float] = None
+    eps: Optional[float] = None
+    beta: Optional[float] = None
+    dividendYield: Optional[float] = None
+    profitMargin: Optional[float] = None
+    targetPrice: Optional[float] = None
+    upside: Optional[float] = None
+    fiftyTwoWeekLow: Optional[float] = None
+    fiftyTwoWeekHigh: Optional[float] = None
+
+class ScreenerQueryResponse(BaseModel):
+    query: str
+    stocks: List[IndexedStock]
+    count: int
+    total: int
+    updatedAt: Optional[str] = None
+    elapsedMs: float
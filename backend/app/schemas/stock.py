@@ -63,3 +63,11 @@ class StockQuote(BaseModel):
     volume: int
     marketCap: float
     timestamp: str
+
+class SymbolError(BaseModel):
+    symbol: str
+    error: str
+
+class BatchQuotes(BaseModel):
+    quotes: List[StockQuote]
+    errors: List[SymbolError] = []
@@ -1,29 +1,45 @@
-from alpha_vantage.timeseries import TimeSeries
-from alpha_vantage.fundamentaldata import FundamentalData
-from typing import List, Dict, Any
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Tuple
 from datetime import datetime
 from app.core.config import settings
-import requests
+from app.core.errors import ServiceBusyError
+from app.services.alpha_vantage_client import av_client
+from app.services.bar_store import bar_store, BAR_DTYPE
+from app.services.fundamentals import fundamentals_cache
+from app.services.market_data import MarketDataProvider
 
-class AlphaVantageService:
+INTRADAY_PERIODS = ['1d', '5d']
+COMPACT_PERIODS = ['1d', '5d', '1mo', '3mo']
+
+# Calendar days covered by each history period
+PERIOD_DAYS = {
+    '1d': 1, '5d': 5, '1mo': 30, '3mo': 91, '6mo': 182,
+    '1y': 365, '2y': 730, '5y': 1826, '10y': 3652
+}
+
+# Symbols per REALTIME_BULK_QUOTES call
+BULK_QUOTE_SIZE = 100
+
+# A compact response holds the last 100 bars; older gaps need a full fetch
+COMPACT_GAP_DAILY = np.timedelta64(140, 'D')
+COMPACT_GAP_INTRADAY = np.timedelta64(5, 'D')
+
+class AlphaVantageService(MarketDataProvider):
     """Service for interacting with Alpha Vantage API"""
     
+    name = "alpha_vantage"
+    
     def __init__(self):
-        self.api_key = settings.ALPHA_VANTAGE_API_KEY
-        self.ts = TimeSeries(key=self.api_key, output_format='json')
-        self.fd = FundamentalData(key=self.api_key, output_format='json')
-        self.base_url = "https://www.alphavantage.co/query"
+        self.client = av_client
+        self.bar_store = bar_store
+        self.fundamentals = fundamentals_cache
+        self._sync_locks: Dict[tuple, asyncio.Lock] = {}
     
-    def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
         """Search for stocks by symbol or name"""
         try:
-            params = {
-                'function': 'SYMBOL_SEARCH',
-                'keywords': query,
-                'apikey': self.api_key
-            }
-            response = requests.get(self.base_url, params=params, timeout=10)
-            data = response.json()
+            data = await self.client.query('SYMBOL_SEARCH', keywords=query, timeout=10)
             
             if 'bestMatches' not in data:
                 return []
@@ -38,27 +54,23 @@ class AlphaVantageService:
                 })
             
             return results
+        except ServiceBusyError:
+            raise
         except Exception as e:
             print(f"Error searching stocks: {e}")
             return []
     
-    def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get detailed information about a stock"""
         try:
             # Get overview data
-            params = {
-                'function': 'OVERVIEW',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            response = requests.get(self.base_url, params=params, timeout=15)
-            overview = response.json()
+            overview = await self.fundamentals.get_overview(symbol)
             
             if 'Symbol' not in overview:
                 raise ValueError(f"Stock {symbol} not found")
             
             # Get quote data
-            quote_data = self.get_stock_quote(symbol)
+            quote_data = await self.get_stock_quote(symbol)
             
             return {
                 'symbol': overview.get('Symbol', symbol),
@@ -90,53 +102,139 @@ class AlphaVantageService:
             print(f"Error getting stock info: {e}")
             raise
     
-    def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
-        """Get historical data for a stock"""
+    async def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
+        """Get historical data for a stock, served from the local bar store"""
         try:
-            # Map period to Alpha Vantage function
-            if period in ['1d', '5d']:
-                data, meta_data = self.ts.get_intraday(symbol, interval='60min', outputsize='full')
-            elif period in ['1mo', '3mo']:
-                data, meta_data = self.ts.get_daily(symbol, outputsize='compact')
-            else:
-                data, meta_data = self.ts.get_daily(symbol, outputsize='full')
+            interval = '60min' if period in INTRADAY_PERIODS else 'daily'
+            bars = await self.get_bars(symbol, interval, full=period not in COMPACT_PERIODS)
+            window = self._slice_period(bars, period)
             
             history = []
-            for date_str, values in sorted(data.items())[:30]:  # Last 30 days
+            for date, open_, high, low, close, volume in window.tolist():
                 history.append({
-                    'date': date_str.split()[0] if ' ' in date_str else date_str,
-                    'open': float(values['1. open']),
-                    'high': float(values['2. high']),
-                    'low': float(values['3. low']),
-                    'close': float(values['4. close']),
-                    'volume': int(values['5. volume'])
+                    'date': date.strftime('%Y-%m-%d'),
+                    'open': open_,
+                    'high': high,
+                    'low': low,
+                    'close': close,
+                    'volume': volume
                 })
             
             return history
+        except ServiceBusyError:
+            raise
         except Exception as e:
             print(f"Error getting stock history: {e}")
             return []
     
-    def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
+    async def get_bars(self, symbol: str, interval: str = 'daily', full: bool = False) -> np.ndarray:
+        """
+        Return stored bars for a symbol, fetching only what is missing upstream
+        
+        The store is synced at most once per refresh interval. When it already
+        holds recent bars a `compact` request (last 100 bars) covers the gap;
+        `full` is only requested for the first backfill or after a long gap.
+        A sync that comes back empty (e.g. a quota note instead of a series)
+        is recorded too, so it is not retried before the interval has passed.
+        """
+        symbol = symbol.upper()
+        lock = self._sync_locks.setdefault((symbol, interval), asyncio.Lock())
+        async with lock:
+            max_age = settings.BAR_REFRESH_INTRADAY_SECONDS if interval != 'daily' else settings.BAR_REFRESH_DAILY_SECONDS
+            needs_backfill = full and self.bar_store.backfill_due(symbol, interval, max_age)
+            if not needs_backfill and self.bar_store.is_fresh(symbol, interval, max_age):
+                return self.bar_store.load(symbol, interval)
+            
+            last_date = self.bar_store.last_date(symbol, interval)
+            gap_limit = COMPACT_GAP_DAILY if interval == 'daily' else COMPACT_GAP_INTRADAY
+            use_full = (
+                needs_backfill
+                or (last_date is None and full)
+                or (last_date is not None and np.datetime64(datetime.now(), 's') - last_date > gap_limit)
+            )
+            
+            try:
+                bars = await self._fetch_bars(symbol, interval, 'full' if use_full else 'compact')
+            except ServiceBusyError:
+                if self.bar_store.last_date(symbol, interval) is None:
+                    raise
+                return self.bar_store.load(symbol, interval)
+            except Exception as e:
+                # Serve whatever we already hold rather than failing the request
+                print(f"Error syncing bars for {symbol}: {e}")
+                return self.bar_store.load(symbol, interval)
+            
+            if len(bars) == 0:
+                self.bar_store.mark_synced(symbol, interval, backfill=use_full)
+                return self.bar_store.load(symbol, interval)
+            return self.bar_store.append(symbol, interval, bars, full=use_full)
+    
+    async def get_bars_many(
+        self, symbols: List[str], interval: str = 'daily'
+    ) -> Tuple[Dict[str, np.ndarray], List[Dict[str, str]]]:
+        """Sync and return stored bars for many symbols, collecting per-symbol errors"""
+        semaphore = asyncio.Semaphore(settings.SCREENER_CONCURRENCY)
+        
+        async def fetch(symbol: str) -> np.ndarray:
+            async with semaphore:
+                return await self.get_bars(symbol, interval)
+        
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        series, errors = {}, []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors.append({'symbol': symbol, 'error': str(result) or type(result).__name__})
+            elif len(result) == 0:
+                errors.append({'symbol': symbol, 'error': f"No price history for {symbol}"})
+            else:
+                series[symbol] = result
+        return series, errors
+    
+    async def _fetch_bars(self, symbol: str, interval: str, outputsize: str) -> np.ndarray:
+        """Download a daily or intraday series and convert it to bar records"""
+        if interval == 'daily':
+            payload = await self.client.query('TIME_SERIES_DAILY', symbol=symbol, outputsize=outputsize)
+            data = payload.get('Time Series (Daily)', {})
+        else:
+            payload = await self.client.query(
+                'TIME_SERIES_INTRADAY', symbol=symbol, interval=interval, outputsize=outputsize
+            )
+            data = payload.get(f'Time Series ({interval})', {})
+        
+        rows = [
+            (
+                np.datetime64(date_str, 's'),
+                float(values['1. open']),
+                float(values['2. high']),
+                float(values['3. low']),
+                float(values['4. close']),
+                int(values['5. volume'])
+            )
+            for date_str, values in data.items()
+        ]
+        return np.array(rows, dtype=BAR_DTYPE)
+    
+    def _slice_period(self, bars: np.ndarray, period: str) -> np.ndarray:
+        """Keep the bars that fall inside the requested period"""
+        if len(bars) == 0 or period == 'max':
+            return bars
+        last_date = bars['date'][-1]
+        if period == 'ytd':
+            cutoff = last_date.astype('datetime64[Y]').astype('datetime64[s]')
+        elif period in PERIOD_DAYS:
+            cutoff = last_date - np.timedelta64(PERIOD_DAYS[period], 'D')
+        else:
+            return bars[-30:]
+        return bars[bars['date'] > cutoff]
+    
+    async def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
         """Get real-time quote for a stock"""
         try:
-            params = {
-                'function': 'GLOBAL_QUOTE',
-                'symbol': symbol,
-                'apikey': self.api_key
-            }
-            response = requests.get(self.base_url, params=params, timeout=15)
-            data = response.json()
+            data = await self.client.query('GLOBAL_QUOTE', symbol=symbol, timeout=15)
             
             if 'Global Quote' not in data or not data['Global Quote']:
                 # Fallback to getting name from overview
-                params_overview = {
-                    'function': 'OVERVIEW',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                overview_response = requests.get(self.base_url, params=params_overview, timeout=15)
-                overview = overview_response.json()
+                overview = await self.fundamentals.get_overview(symbol)
                 name = overview.get('Name', symbol)
                 
                 return {
@@ -173,3 +271,64 @@ class AlphaVantageService:
         except Exception as e:
             print(f"Error getting stock quote: {e}")
             raise
+    
+    async def get_stock_quotes(self, symbols: List[str], fallback: bool = True) -> Dict[str, Any]:
+        """
+        Get quotes for many symbols at once
+        
+        Uses REALTIME_BULK_QUOTES (100 symbols per call) when the key has access
+        to it, and concurrent GLOBAL_QUOTE calls for anything it did not return
+        (unless `fallback` is off). Failures are reported per symbol instead of
+        failing the whole batch.
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        quotes: Dict[str, Dict[str, Any]] = {}
+        
+        if settings.ALPHA_VANTAGE_BULK_QUOTES:
+            for i in range(0, len(symbols), BULK_QUOTE_SIZE):
+                chunk = symbols[i:i + BULK_QUOTE_SIZE]
+                try:
+                    quotes.update(await self._get_bulk_quotes(chunk))
+                except ServiceBusyError:
+                    raise
+                except Exception as e:
+                    print(f"Error getting bulk quotes: {e}")
+        
+        remaining = [symbol for symbol in symbols if symbol not in quotes]
+        if not fallback:
+            return {
+                'quotes': [quotes[symbol] for symbol in symbols if symbol in quotes],
+                'errors': [{'symbol': symbol, 'error': 'No bulk quote'} for symbol in remaining]
+            }
+        fetched, errors = await self._gather_quotes(remaining)
+        quotes.update(fetched)
+        
+        return {
+            'quotes': [quotes[symbol] for symbol in symbols if symbol in quotes],
+            'errors': errors
+        }
+    
+    async def _get_bulk_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch up to 100 quotes in one REALTIME_BULK_QUOTES call"""
+        data = await self.client.query('REALTIME_BULK_QUOTES', symbol=','.join(symbols), timeout=15)
+        
+        quotes = {}
+        for item in data.get('data', []):
+            symbol = item.get('symbol', '').upper()
+            if not symbol:
+                continue
+            quotes[symbol] = {
+                'symbol': symbol,
+                'name': symbol,
+                'price': float(item.get('close', 0)),
+                'change': float(item.get('change', 0)),
+                'changePercent': float(str(item.get('change_percent', '0')).replace('%', '')),
+                'previousClose': float(item.get('previous_close', 0)),
+                'open': float(item.get('open', 0)),
+                'dayLow': float(item.get('low', 0)),
+                'dayHigh': float(item.get('high', 0)),
+                'volume': int(float(item.get('volume', 0))),
+                'marketCap': 0,
+                'timestamp': datetime.now().isoformat()
+            }
+        return quotes
@@ -0,0 +1,92 @@
+import asyncio
+import csv
+import io
+import random
+import time
+from typing import Dict, Any, Optional
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.core.metrics import track_upstream
+from app.services.cassettes import CassetteStore
+from app.services.upstream_scheduler import Priority, upstream_scheduler
+
+
+class AlphaVantageClient:
+    """Thin async client for the Alpha Vantage query endpoint
+
+    Every upstream call in the services goes through `query`, which uses the
+    shared connection pool from `app.core.http` and the global rate limiter.
+    
+    UPSTREAM_MODE switches the client between `live`, `record` (live calls,
+    responses saved to the cassette store) and `replay` (responses served
+    from the cassette store without touching the network or the quota).
+    """
+    
+    BASE_URL = "https://www.alphavantage.co/query"
+    # Functions that only answer in CSV; their rows come back as {'data': [...]}
+    CSV_FUNCTIONS = {'LISTING_STATUS', 'EARNINGS_CALENDAR', 'IPO_CALENDAR'}
+    
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or settings.ALPHA_VANTAGE_API_KEY
+        self.scheduler = upstream_scheduler
+        self.mode = settings.UPSTREAM_MODE
+        self.cassettes = CassetteStore() if self.mode in ('record', 'replay') else None
+    
+    async def query(
+        self,
+        function: str,
+        timeout: Optional[float] = None,
+        priority: Optional[Priority] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """
+        Call an Alpha Vantage function and return the decoded JSON payload
+        (CSV_FUNCTIONS return `{'data': [row dicts]}`)
+        
+        Identical concurrent calls (same function and parameters) share one
+        upstream request. `priority` picks the scheduler lane; by default the
+        lane of the calling context is used.
+        """
+        if self.mode == 'replay':
+            return await self._replay(function, params)
+        
+        key = (function,) + tuple(sorted(params.items()))
+        return await self.scheduler.run(
+            key, lambda: self._get(function, timeout, params), priority
+        )
+    
+    @track_upstream
+    async def _get(self, function: str, timeout: Optional[float], params: Dict[str, Any]) -> Dict[str, Any]:
+        request_params = {'function': function, **params, 'apikey': self.api_key}
+        client = get_http_client()
+        start = time.monotonic()
+        response = await client.get(
+            self.BASE_URL,
+            params=request_params,
+            timeout=timeout if timeout is not None else settings.HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        if function in self.CSV_FUNCTIONS:
+            payload = {'data': list(csv.DictReader(io.StringIO(response.text)))}
+        else:
+            payload = response.json()
+        
+        if self.mode == 'record':
+            self.cassettes.save(function, params, payload, time.monotonic() - start)
+        return payload
+    
+    async def _replay(self, function: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve a recorded response, optionally with injected latency (not counted as an upstream call)"""
+        entry = self.cassettes.load(function, params)
+        delay = (
+            entry.get('elapsed', 0) * settings.REPLAY_LATENCY_SCALE
+            + settings.REPLAY_LATENCY_MS / 1000
+            + random.uniform(0, settings.REPLAY_JITTER_MS) / 1000
+        )
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return entry['payload']
+
+
+# Shared by every service so all upstream traffic uses one pool
+av_client = AlphaVantageClient()
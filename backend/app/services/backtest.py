@@ -0,0 +1,239 @@
+"""
+Backtest of the recommendation rules over stored daily bars
+
+Replays the technical rules of `MLPredictionService._calculate_signals_with_data`
+and the final recommendation of `get_combined_analysis` on every trading day.
+All indicators are evaluated along the whole time axis at once; symbols are
+spread over a process pool.
+
+Prophet is far too slow to refit on every day of a multi-year run, so the
+prediction leg uses a rolling OLS trend on log prices over the same 3-month
+window the API fits on (the `linear` engine), evaluated in closed form.
+
+Usage:
+    python -m app.services.backtest --symbols AAPL,MSFT --horizon 7 --years 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from app.services import indicators
+from app.services.bar_store import BarStore, cli_symbols
+
+# Bars in the history window the API fits on ('3mo' of trading days)
+TREND_WINDOW = 63
+# The API refuses to analyze fewer bars than this
+MIN_HISTORY = 30
+
+RECOMMENDATIONS = ['STRONG BUY', 'BUY', 'HOLD', 'SELL', 'STRONG SELL']
+# Position taken for each recommendation: long, flat or short
+POSITIONS = {'STRONG BUY': 1, 'BUY': 1, 'HOLD': 0, 'SELL': -1, 'STRONG SELL': -1}
+
+
+def technical_recommendation(close: np.ndarray) -> np.ndarray:
+    """Per-day BUY/SELL/HOLD from the RSI and MACD rules, as an array of labels"""
+    series = close[None, :]
+    rsi = indicators.rsi(series)[0]
+    macd, signal, histogram = (values[0] for values in indicators.macd(series))
+    
+    buy = (rsi < 30).astype(int) + ((histogram > 0) & (macd > signal)).astype(int)
+    sell = (rsi > 70).astype(int) + ((histogram < 0) & (macd < signal)).astype(int)
+    return np.where(buy > sell, 'BUY', np.where(sell > buy, 'SELL', 'HOLD'))
+
+
+def trend_prediction(close: np.ndarray, horizon: int, window: int = TREND_WINDOW) -> np.ndarray:
+    """
+    Per-day 'up'/'down' from an OLS trend on the trailing `window` log prices
+    
+    The fit for every window comes from cumulative sums, so the whole series
+    costs O(n). Days before a full window are 'none'.
+    """
+    n = len(close)
+    trend = np.full(n, 'none', dtype=object)
+    if n < window:
+        return trend
+    
+    y = np.log(close)
+    index = np.arange(n, dtype=np.float64)
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    cum_iy = np.concatenate([[0.0], np.cumsum(index * y)])
+    
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    sum_y = cum_y[end + 1] - cum_y[start]
+    # x runs 0..window-1 inside each window
+    sum_xy = (cum_iy[end + 1] - cum_iy[start]) - start * sum_y
+    x = np.arange(window, dtype=np.float64)
+    sum_x, sum_xx = x.sum(), (x ** 2).sum()
+    
+    slope = (window * sum_xy - sum_x * sum_y) / (window * sum_xx - sum_x ** 2)
+    intercept = (sum_y - slope * sum_x) / window
+    predicted = intercept + slope * (window - 1 + horizon)
+    trend[window - 1:] = np.where(predicted > y[end], 'up', 'down')
+    return trend
+
+
+def combined_recommendation(trend: np.ndarray, technical: np.ndarray) -> np.ndarray:
+    """Vectorized form of the final recommendation rules in get_combined_analysis"""
+    prediction = np.where(trend == 'up', 'BUY', 'SELL')
+    return np.select(
+        [
+            (prediction == 'BUY') & np.isin(technical, ['BUY', 'HOLD']),
+            (prediction == 'SELL') & np.isin(technical, ['SELL', 'HOLD']),
+            prediction == technical,
+        ],
+        ['STRONG BUY', 'STRONG SELL', prediction],
+        default='HOLD'
+    )
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """Largest peak-to-trough fall of an equity curve, as a positive fraction"""
+    if len(equity) == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(equity)
+    return float(np.max(1 - equity / peaks))
+
+
+def backtest_bars(close: np.ndarray, horizon: int = 7) -> Dict[str, Any]:
+    """
+    Replay the rules over one close series
+    
+    A recommendation is a hit when the close `horizon` bars later moved in its
+    direction. The strategy holds the recommended position for the next bar
+    and is re-evaluated daily.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    recommendation = combined_recommendation(trend_prediction(close, horizon), technical_recommendation(close))
+    
+    # Only days with enough history and a realized outcome are scored
+    active = np.zeros(len(close), dtype=bool)
+    active[max(TREND_WINDOW, MIN_HISTORY) - 1:len(close) - horizon] = True
+    forward = np.full(len(close), np.nan)
+    forward[:len(close) - horizon] = close[horizon:] / close[:len(close) - horizon] - 1
+    position = np.vectorize(POSITIONS.get, otypes=[float])(recommendation)
+    
+    # Daily strategy returns: today's position earns tomorrow's move
+    daily = np.zeros(len(close))
+    daily[1:] = close[1:] / close[:-1] - 1
+    strategy = np.where(active[:-1], position[:-1], 0.0) * daily[1:]
+    equity = np.cumprod(1 + strategy)
+    
+    directional = active & (position != 0)
+    hits = np.sign(forward) == position
+    by_recommendation = {}
+    for label in RECOMMENDATIONS:
+        mask = active & (recommendation == label)
+        if mask.any():
+            by_recommendation[label] = {
+                'count': int(mask.sum()),
+                'hit_rate': round(float(hits[mask].mean()), 4) if POSITIONS[label] else None,
+                'avg_forward_return': round(float(forward[mask].mean()), 6),
+            }
+    
+    scored = active.sum()
+    return {
+        'days': int(scored),
+        'signals': int(directional.sum()),
+        'hits': int(hits[directional].sum()),
+        'hit_rate': round(float(hits[directional].mean()), 4) if directional.any() else None,
+        'total_return': round(float(equity[-1] - 1), 6) if len(equity) else 0.0,
+        'buy_and_hold_return': round(float(close[active][-1] / close[active][0] - 1), 6) if scored else 0.0,
+        'max_drawdown': round(max_drawdown(np.concatenate([[1.0], equity])), 6),
+        'recommendations': by_recommendation,
+    }
+
+
+def backtest_symbol(root: str, symbol: str, horizon: int, years: Optional[float]) -> Dict[str, Any]:
+    """Worker entry point: backtest one symbol from the bar store under `root`"""
+    bars = BarStore(root).load(symbol, 'daily')
+    if years:
+        cutoff = bars['date'][-1] - np.timedelta64(int(years * 365.25), 'D') if len(bars) else None
+        bars = bars[bars['date'] >= cutoff] if cutoff is not None else bars
+    if len(bars) < TREND_WINDOW + horizon + 1:
+        return {'symbol': symbol, 'error': f"Insufficient data for {symbol}"}
+    
+    report = backtest_bars(bars['close'], horizon)
+    report['symbol'] = symbol
+    report['start'] = str(bars['date'][0].astype('datetime64[D]'))
+    report['end'] = str(bars['date'][-1].astype('datetime64[D]'))
+    return report
+
+
+def summarize(reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pool per-symbol reports into universe-wide figures"""
+    ok = [report for report in reports if 'error' not in report]
+    signals = sum(report['signals'] for report in ok)
+    hits = sum(report['hits'] for report in ok)
+    returns = np.array([report['total_return'] for report in ok])
+    by_recommendation = {}
+    for label in RECOMMENDATIONS:
+        entries = [report['recommendations'][label] for report in ok if label in report['recommendations']]
+        count = sum(entry['count'] for entry in entries)
+        if count:
+            by_recommendation[label] = {
+                'count': count,
+                'hit_rate': round(sum(entry['hit_rate'] * entry['count'] for entry in entries) / count, 4)
+                if POSITIONS[label] else None,
+                'avg_forward_return': round(
+                    sum(entry['avg_forward_return'] * entry['count'] for entry in entries) / count, 6
+                ),
+            }
+    
+    return {
+        'symbols': len(ok),
+        'failed': len(reports) - len(ok),
+        'signals': signals,
+        'hit_rate': round(hits / signals, 4) if signals else None,
+        'mean_return': round(float(returns.mean()), 6) if len(returns) else None,
+        'median_return': round(float(np.median(returns)), 6) if len(returns) else None,
+        'worst_drawdown': max((report['max_drawdown'] for report in ok), default=None),
+        'recommendations': by_recommendation,
+    }
+
+
+def run_backtest(
+    symbols: List[str], root: str, horizon: int = 7, years: Optional[float] = None, workers: int = 0
+) -> Dict[str, Any]:
+    """Backtest every symbol across a process pool and return the full report"""
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(backtest_symbol, root, symbol, horizon, years) for symbol in symbols]
+        reports = [future.result() for future in futures]
+    
+    return {
+        'horizon': horizon,
+        'summary': summarize(reports),
+        'symbols': reports,
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def main() -> None:
+    from app.core.config import settings
+    
+    parser = argparse.ArgumentParser(description="Backtest the recommendation rules on stored daily bars")
+    parser.add_argument('--symbols', help="Comma-separated symbols (default: every stored symbol)")
+    parser.add_argument('--horizon', type=int, default=7, help="Prediction horizon in trading days")
+    parser.add_argument('--years', type=float, help="Only replay the most recent N years")
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument('--sync', action='store_true', help="Backfill full history upstream first (the --symbols, or every stored symbol)")
+    parser.add_argument('--output', help="Write the full JSON report here")
+    args = parser.parse_args()
+    
+    symbols = cli_symbols(parser, args, BarStore(settings.DATA_DIR))
+    
+    report = run_backtest(symbols, settings.DATA_DIR, args.horizon, args.years, args.workers)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps({key: report[key] for key in ('horizon', 'summary', 'elapsed_seconds')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
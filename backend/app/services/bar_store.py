@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
+
+# One row per bar; dates are stored as UTC-naive seconds
+BAR_DTYPE = np.dtype([
+    ('date', 'datetime64[s]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8'),
+])
+
+
+class BarStore:
+    """On-disk OHLCV store with one memory-mapped NumPy file per symbol and interval
+
+    Each `<SYMBOL>_<interval>.npy` file holds bars sorted by date. A small JSON
+    sidecar records when the series was last synced with upstream and whether
+    it has been backfilled with the full history.
+    """
+    
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.DATA_DIR) / 'bars'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    def _bars_path(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{symbol.upper()}_{interval}.npy"
+    
+    def _meta_path(self, symbol: str, interval: str) -> Path:
+        return self.root / f"{symbol.upper()}_{interval}.json"
+    
+    def load(self, symbol: str, interval: str) -> np.ndarray:
+        """Return all stored bars (read-only memory map), or an empty array"""
+        path = self._bars_path(symbol, interval)
+        if not path.exists():
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.load(path, mmap_mode='r')
+    
+    def meta(self, symbol: str, interval: str) -> Dict[str, Any]:
+        path = self._meta_path(symbol, interval)
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+    
+    def last_date(self, symbol: str, interval: str) -> Optional[np.datetime64]:
+        bars = self.load(symbol, interval)
+        return bars['date'][-1] if len(bars) else None
+    
+    def symbols(self, interval: str = 'daily') -> List[str]:
+        """Symbols with stored bars for `interval`"""
+        suffix = f"_{interval}.npy"
+        return sorted(path.name[:-len(suffix)] for path in self.root.glob(f"*{suffix}"))
+    
+    def is_fresh(self, symbol: str, interval: str, max_age: float) -> bool:
+        """True if the series was synced with upstream within `max_age` seconds"""
+        synced_at = self.meta(symbol, interval).get('synced_at', 0)
+        return time.time() - synced_at < max_age
+    
+    def backfill_due(self, symbol: str, interval: str, max_age: float) -> bool:
+        """True if the full history is missing and no backfill came back empty within `max_age` seconds"""
+        meta = self.meta(symbol, interval)
+        if meta.get('full', False):
+            return False
+        return time.time() - meta.get('backfill_failed_at', 0) >= max_age
+    
+    def mark_synced(self, symbol: str, interval: str, backfill: bool = False) -> None:
+        """Record a sync that returned no bars, so the refresh interval still applies to it"""
+        with self._lock:
+            meta = self.meta(symbol, interval)
+            meta['synced_at'] = time.time()
+            if backfill:
+                meta['backfill_failed_at'] = meta['synced_at']
+            self._write_meta(symbol, interval, meta)
+    
+    def append(self, symbol: str, interval: str, bars: np.ndarray, full: bool = False) -> np.ndarray:
+        """Merge `bars` into the stored series, keeping only dates after the last stored bar
+
+        A full backfill may also carry bars older than what is stored, so in that
+        case the two series are merged on date instead.
+        """
+        bars = np.sort(np.asarray(bars, dtype=BAR_DTYPE), order='date')
+        with self._lock:
+            stored = np.array(self.load(symbol, interval))
+            if len(stored) == 0:
+                merged = bars
+            elif full:
+                older = bars[bars['date'] < stored['date'][0]]
+                newer = bars[bars['date'] > stored['date'][-1]]
+                merged = np.concatenate([older, stored, newer])
+            else:
+                newer = bars[bars['date'] > stored['date'][-1]]
+                # The latest stored bar may still have been in progress when fetched
+                latest = bars[bars['date'] == stored['date'][-1]]
+                if len(latest):
+                    stored[-1] = latest[-1]
+                merged = np.concatenate([stored, newer])
+            
+            self._write(symbol, interval, merged)
+            meta = self.meta(symbol, interval)
+            meta['synced_at'] = time.time()
+            meta['full'] = bool(full or meta.get('full', False))
+            self._write_meta(symbol, interval, meta)
+        return self.load(symbol, interval)
+    
+    def _write(self, symbol: str, interval: str, bars: np.ndarray) -> None:
+        # Write to a temp file and swap it in so open memory maps stay valid
+        path = self._bars_path(symbol, interval)
+        tmp_path = path.with_suffix('.tmp.npy')
+        np.save(tmp_path, bars)
+        os.replace(tmp_path, path)
+    
+    def _write_meta(self, symbol: str, interval: str, meta: Dict[str, Any]) -> None:
+        path = self._meta_path(symbol, interval)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, path)
+
+
+async def backfill(symbols: List[str]) -> None:
+    """Sync full daily history for each symbol through the market data service"""
+    from app.core.http import close_http_client
+    from app.services.alpha_vantage import AlphaVantageService
+    from app.services.upstream_scheduler import Priority, upstream_lane
+    
+    service = AlphaVantageService()
+    with upstream_lane(Priority.BACKGROUND):
+        for symbol in symbols:
+            try:
+                await service.get_bars(symbol, 'daily', full=True)
+            except Exception as e:
+                print(f"Error syncing {symbol}: {e}")
+    await close_http_client()
+
+
+def cli_symbols(parser: argparse.ArgumentParser, args: argparse.Namespace, store: BarStore) -> List[str]:
+    """
+    Symbols for the offline CLIs: `--symbols`, or every symbol with stored daily bars
+    
+    With `--sync` their full history is backfilled upstream first.
+    """
+    if args.symbols:
+        symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()]
+    else:
+        symbols = store.symbols('daily')
+    if args.sync:
+        if not symbols:
+            parser.error("--sync has nothing to backfill: the bar store is empty, pass --symbols")
+        asyncio.run(backfill(symbols))
+    return symbols
+
+
+bar_store = BarStore()
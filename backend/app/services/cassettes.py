@@ -0,0 +1,44 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no recording exists for a request"""
+
+
+class CassetteStore:
+    """
+    On-disk store of raw upstream responses for record/replay runs
+    
+    Each response is a gzipped JSON file under `<DATA_DIR>/cassettes/<function>/`,
+    named by a hash of the request parameters (the API key is never part of it).
+    """
+    
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.CASSETTE_DIR or Path(settings.DATA_DIR) / 'cassettes')
+    
+    def _path(self, function: str, params: Dict[str, Any]) -> Path:
+        key = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self.root / function / f"{digest}.json.gz"
+    
+    def load(self, function: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the recorded entry (`params`, `payload`, `elapsed`) for a request"""
+        path = self._path(function, params)
+        if not path.exists():
+            raise CassetteMissError(f"No recording for {function} {params}")
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def save(self, function: str, params: Dict[str, Any], payload: Any, elapsed: float) -> None:
+        path = self._path(function, params)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'function': function, 'params': params, 'payload': payload, 'elapsed': elapsed}, f)
+        os.replace(tmp_path, path)
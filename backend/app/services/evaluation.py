@@ -0,0 +1,284 @@
+"""
+Walk-forward (rolling-origin) accuracy evaluation of the forecasting engines
+
+For each symbol the forecaster is refitted at a series of past cutoffs on the
+same 3-month window the API trains on, and each forecast is scored against
+the closes that followed. Fold forecasts never change once their cutoff is in
+the past, so they are cached on disk and later runs only fit new cutoffs.
+
+Usage:
+    python -m app.services.evaluation --symbols AAPL,MSFT --model prophet --folds 12
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.services.forecasting import fit_forecast
+
+# Calendar days of history per fit, like the API's '3mo' period
+TRAIN_DAYS = 91
+# Forecast length per fold; matches MAX_PREDICTION_DAYS
+EVAL_HORIZON = 30
+DEFAULT_FOLDS = 12
+DEFAULT_STEP = 5  # Bars between consecutive cutoffs
+MIN_TRAIN_BARS = 30
+
+Submit = Callable[..., Awaitable[Any]]
+
+
+class WalkForwardEvaluator:
+    """
+    Runs and stores walk-forward evaluations
+    
+    Layout under `<DATA_DIR>/evaluation`:
+        folds/<model>/<SYMBOL>/<cutoff>.json  one cached fold forecast
+        <model>/<SYMBOL>.json                 latest per-horizon metrics
+    """
+    
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.DATA_DIR) / 'evaluation'
+        self._results: Dict[tuple, tuple] = {}
+    
+    def _fold_path(self, model: str, symbol: str, cutoff: str) -> Path:
+        return self.root / 'folds' / model / symbol.upper() / f"{cutoff}.json"
+    
+    def _result_path(self, model: str, symbol: str) -> Path:
+        return self.root / model / f"{symbol.upper()}.json"
+    
+    def plan(self, bars: np.ndarray, folds: int = DEFAULT_FOLDS, step: int = DEFAULT_STEP) -> List[int]:
+        """Cutoff bar indices, oldest first, each leaving at least one realized bar after it"""
+        cutoffs = []
+        index = len(bars) - 1 - step
+        while index >= MIN_TRAIN_BARS - 1 and len(cutoffs) < folds:
+            cutoffs.append(index)
+            index -= step
+        return cutoffs[::-1]
+    
+    async def evaluate(
+        self,
+        symbol: str,
+        bars: np.ndarray,
+        model: str = 'prophet',
+        folds: int = DEFAULT_FOLDS,
+        step: int = DEFAULT_STEP,
+        submit: Optional[Submit] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate `model` on `bars` and store the per-horizon metrics
+        
+        Missing fold forecasts are computed concurrently through `submit(fn,
+        *args)` (e.g. a process pool); without it they run inline.
+        """
+        symbol = symbol.upper()
+        forecasts = []
+        missing = []
+        for index in self.plan(bars, folds, step):
+            cutoff = str(bars['date'][index].astype('datetime64[D]'))
+            cached = self._load_fold(model, symbol, cutoff)
+            if cached is not None:
+                forecasts.append(cached)
+            else:
+                missing.append((cutoff, self._train_frame(bars, index)))
+        
+        if missing:
+            async def run(df: pd.DataFrame):
+                if submit is None:
+                    return fit_forecast(df, EVAL_HORIZON, model)
+                return await submit(fit_forecast, df, EVAL_HORIZON, model)
+            
+            results = await asyncio.gather(*(run(df) for _, df in missing), return_exceptions=True)
+            for (cutoff, _), result in zip(missing, results):
+                if isinstance(result, Exception):
+                    print(f"Error evaluating {symbol} at {cutoff}: {result}")
+                    continue
+                fold = {
+                    'cutoff': cutoff,
+                    'ds': result['ds'].dt.strftime('%Y-%m-%d').tolist(),
+                    'yhat': result['yhat'].tolist(),
+                    'yhat_lower': result['yhat_lower'].tolist(),
+                    'yhat_upper': result['yhat_upper'].tolist(),
+                }
+                self._save_fold(model, symbol, fold)
+                forecasts.append(fold)
+        
+        if not forecasts:
+            raise ValueError(f"Insufficient data for {symbol}")
+        
+        report = {
+            'symbol': symbol,
+            'model': model,
+            'folds': len(forecasts),
+            'step': step,
+            'evaluated_at': datetime.now().isoformat(),
+            'horizons': self.score(bars, forecasts),
+        }
+        self._save_result(model, symbol, report)
+        return report
+    
+    @staticmethod
+    def _train_frame(bars: np.ndarray, index: int) -> pd.DataFrame:
+        end = bars['date'][index]
+        train = bars[:index + 1]
+        train = train[train['date'] > end - np.timedelta64(TRAIN_DAYS, 'D')]
+        # Prophet expects nanosecond timestamps
+        return pd.DataFrame({
+            'ds': pd.to_datetime(train['date'].astype('datetime64[ns]')),
+            'y': train['close'].astype(float),
+        })
+    
+    @staticmethod
+    def score(bars: np.ndarray, forecasts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        MAPE (%), RMSE and interval coverage per horizon (calendar days ahead)
+        
+        A forecast for a non-trading day is scored against the last close on or
+        before it; horizons not yet realized are left out.
+        """
+        dates = bars['date'].astype('datetime64[D]')
+        close = np.asarray(bars['close'], dtype=np.float64)
+        predicted = np.full((len(forecasts), EVAL_HORIZON), np.nan)
+        lower, upper, actual = predicted.copy(), predicted.copy(), predicted.copy()
+        
+        for row, fold in enumerate(forecasts):
+            targets = np.array(fold['ds'][:EVAL_HORIZON], dtype='datetime64[D]')
+            count = len(targets)
+            predicted[row, :count] = fold['yhat'][:EVAL_HORIZON]
+            lower[row, :count] = fold['yhat_lower'][:EVAL_HORIZON]
+            upper[row, :count] = fold['yhat_upper'][:EVAL_HORIZON]
+            positions = np.searchsorted(dates, targets, side='right') - 1
+            realized = targets <= dates[-1]
+            actual[row, :count] = np.where(realized, close[positions], np.nan)
+        
+        valid = ~np.isnan(actual) & ~np.isnan(predicted)
+        horizons = []
+        for h in range(EVAL_HORIZON):
+            mask = valid[:, h]
+            if not mask.any():
+                continue
+            error = predicted[mask, h] - actual[mask, h]
+            inside = (actual[mask, h] >= lower[mask, h]) & (actual[mask, h] <= upper[mask, h])
+            horizons.append({
+                'horizon': h + 1,
+                'samples': int(mask.sum()),
+                'mape': round(float(np.mean(np.abs(error) / actual[mask, h]) * 100), 4),
+                'rmse': round(float(np.sqrt(np.mean(error ** 2))), 4),
+                'coverage': round(float(inside.mean()), 4),
+            })
+        return horizons
+    
+    def load(self, symbol: str, model: str = 'prophet') -> Optional[Dict[str, Any]]:
+        """Latest stored report, re-read only when the file changes"""
+        path = self._result_path(model, symbol)
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            return None
+        
+        cached = self._results.get((model, symbol.upper()))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            report = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        self._results[(model, symbol.upper())] = (mtime, report)
+        return report
+    
+    def accuracy_for(self, symbol: str, model: str, days: int) -> Optional[Dict[str, Any]]:
+        """Measured accuracy for a `days`-ahead prediction, if it has been evaluated"""
+        report = self.load(symbol, model)
+        if not report or not report['horizons']:
+            return None
+        # Fall back to the longest realized horizon below `days`
+        candidates = [entry for entry in report['horizons'] if entry['horizon'] <= days]
+        if not candidates:
+            return None
+        entry = candidates[-1]
+        return {**entry, 'folds': report['folds'], 'evaluated_at': report['evaluated_at']}
+    
+    def _load_fold(self, model: str, symbol: str, cutoff: str) -> Optional[Dict[str, Any]]:
+        path = self._fold_path(model, symbol, cutoff)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+    
+    def _save_fold(self, model: str, symbol: str, fold: Dict[str, Any]) -> None:
+        self._write(self._fold_path(model, symbol, fold['cutoff']), fold)
+    
+    def _save_result(self, model: str, symbol: str, report: Dict[str, Any]) -> None:
+        self._write(self._result_path(model, symbol), report)
+    
+    @staticmethod
+    def _write(path: Path, data: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+
+
+evaluator = WalkForwardEvaluator()
+
+
+async def _run_cli(args: argparse.Namespace, symbols: List[str]) -> None:
+    from app.services.bar_store import bar_store
+    
+    loop = asyncio.get_running_loop()
+    workers = args.workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        async def submit(fn, *fn_args):
+            return await loop.run_in_executor(pool, fn, *fn_args)
+        
+        async def evaluate(symbol: str) -> Dict[str, Any]:
+            try:
+                return await evaluator.evaluate(
+                    symbol, bar_store.load(symbol, 'daily'), args.model, args.folds, args.step, submit
+                )
+            except Exception as e:
+                return {'symbol': symbol, 'error': str(e)}
+        
+        reports = await asyncio.gather(*(evaluate(symbol) for symbol in symbols))
+    
+    for report in reports:
+        if 'error' in report:
+            print(f"{report['symbol']}: {report['error']}")
+            continue
+        shown = [entry for entry in report['horizons'] if entry['horizon'] in (1, 7, 14, 30)]
+        summary = ', '.join(
+            f"h{entry['horizon']} MAPE {entry['mape']:.2f}% RMSE {entry['rmse']:.2f} cov {entry['coverage']:.0%}"
+            for entry in shown
+        )
+        print(f"{report['symbol']} ({report['folds']} folds): {summary}")
+    print(f"Evaluated {len(symbols)} symbols in {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    from app.services.bar_store import bar_store, cli_symbols
+    
+    parser = argparse.ArgumentParser(description="Walk-forward accuracy evaluation of the forecasters")
+    parser.add_argument('--symbols', help="Comma-separated symbols (default: every stored symbol)")
+    parser.add_argument('--model', default='prophet', choices=['prophet', 'linear', 'damped'])
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help="Cutoffs per symbol")
+    parser.add_argument('--step', type=int, default=DEFAULT_STEP, help="Bars between cutoffs")
+    parser.add_argument('--workers', type=int, default=0, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        '--sync', action='store_true', help="Backfill full history upstream first (the --symbols, or every stored symbol)"
+    )
+    args = parser.parse_args()
+    asyncio.run(_run_cli(args, cli_symbols(parser, args, bar_store)))
+
+
+if __name__ == '__main__':
+    main()
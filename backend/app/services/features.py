@@ -0,0 +1,45 @@
+import pandas as pd
+from typing import Any, Dict, List, Tuple
+
+
+def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+    """Calculate Relative Strength Index"""
+    delta = prices.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def calculate_macd(
+    prices: pd.Series, fast: int = 12, slow: int = 26, signal_period: int = 9
+) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """Calculate MACD (Moving Average Convergence Divergence)"""
+    exp1 = prices.ewm(span=fast, adjust=False).mean()
+    exp2 = prices.ewm(span=slow, adjust=False).mean()
+    macd = exp1 - exp2
+    signal = macd.ewm(span=signal_period, adjust=False).mean()
+    histogram = macd - signal
+    return macd, signal, histogram
+
+
+def build_feature_frame(history: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Build the prepared frame shared by predictions and technical signals
+    
+    Rows are sorted by date and carry the typed OHLCV columns, Prophet's
+    `ds`/`y` columns and the indicator columns (`rsi`, `macd`,
+    `macd_signal`, `macd_histogram`).
+    """
+    df = pd.DataFrame(history).sort_values('date').reset_index(drop=True)
+    for column in ['open', 'high', 'low', 'close']:
+        df[column] = df[column].astype(float)
+    df['volume'] = df['volume'].astype('int64')
+    
+    df['ds'] = pd.to_datetime(df['date'])
+    df['y'] = df['close']
+    
+    df['rsi'] = calculate_rsi(df['close'], period=14)
+    df['macd'], df['macd_signal'], df['macd_histogram'] = calculate_macd(df['close'])
+    return df
@@ -0,0 +1,103 @@
+"""
+Prophet model fitting, executed inside the model worker processes
+
+Only depends on the model registry (no app settings or services) so worker
+processes start quickly; Prophet itself is imported on first use in each worker.
+"""
+import logging
+import os
+import time
+import warnings
+import pandas as pd
+from typing import Any, Dict, Optional
+from app.services.fast_forecast import forecast_frame
+from app.services.model_registry import ModelRegistry, warm_start_params
+
+# Suppress Prophet's plotly warning and other verbose logs
+warnings.filterwarnings('ignore')
+logging.getLogger('prophet').setLevel(logging.ERROR)
+logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
+
+# Disable Stan backend to avoid compatibility issues
+os.environ['PROPHET_SUPPRESS_STAN_WARNINGS'] = '1'
+
+
+def _new_model():
+    from prophet import Prophet
+    
+    # Simplified backend, conservative changepoints, 95% confidence interval
+    return Prophet(
+        daily_seasonality=True,
+        yearly_seasonality=False,
+        weekly_seasonality=True,
+        changepoint_prior_scale=0.05,  # More conservative
+        interval_width=0.95,  # 95% confidence interval
+        stan_backend=None  # Disable Stan backend
+    )
+
+
+def _fit(df: pd.DataFrame, init: Optional[Dict[str, Any]] = None):
+    model = _new_model()
+    # Suppress Prophet's verbose output during training
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if init is None:
+            model.fit(df, algorithm='Newton')
+        else:
+            model.fit(df, algorithm='Newton', init=init)
+    return model
+
+
+def fit_prophet_forecast(
+    df: pd.DataFrame,
+    periods: int,
+    symbol: Optional[str] = None,
+    registry_root: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Fit Prophet on a `ds`/`y` frame and forecast `periods` days ahead
+    
+    With a registry, a model already fitted on the same last bar is reused as
+    is, and otherwise the fit is warm-started from the symbol's latest stored
+    model before being saved as a new version.
+    
+    Returns only the future rows with `ds`, `yhat`, `yhat_lower`, `yhat_upper`,
+    with the fit and predict times in `attrs` (`fit_seconds` is None when a
+    stored model was reused).
+    """
+    registry = ModelRegistry(registry_root) if registry_root and symbol else None
+    version = df['ds'].max().strftime('%Y-%m-%d')
+    
+    model = registry.load(symbol, version) if registry else None
+    fit_seconds = None
+    if model is None:
+        start = time.perf_counter()
+        previous = registry.load(symbol) if registry else None
+        if previous is not None:
+            try:
+                model = _fit(df, init=warm_start_params(previous))
+            except Exception:
+                pass  # Incompatible parameter shapes, fit from scratch
+        if model is None:
+            model = _fit(df)
+        fit_seconds = time.perf_counter() - start
+        if registry:
+            registry.save(symbol, version, model)
+    
+    # Make future predictions
+    start = time.perf_counter()
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    
+    # Get predictions (only future dates)
+    predictions = forecast[forecast['ds'] > df['ds'].max()]
+    result = predictions[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True)
+    result.attrs.update(fit_seconds=fit_seconds, predict_seconds=time.perf_counter() - start)
+    return result
+
+
+def fit_forecast(df: pd.DataFrame, periods: int, model: str = 'prophet') -> pd.DataFrame:
+    """Forecast with any engine from scratch, bypassing the registry (walk-forward folds)"""
+    if model != 'prophet':
+        return forecast_frame(model, df, periods)
+    return fit_prophet_forecast(df, periods)
@@ -0,0 +1,95 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.services.alpha_vantage_client import av_client
+from app.services.upstream_scheduler import Priority
+
+
+class FundamentalsCache:
+    """
+    Persistent cache of Alpha Vantage OVERVIEW payloads
+    
+    Payloads live in a SQLite table in DATA_DIR with an in-memory layer on top,
+    and are refreshed from upstream at most once per FUNDAMENTALS_TTL. A stale
+    entry is still served if the refresh fails.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.client = av_client
+        self.path = Path(path or Path(settings.DATA_DIR) / 'fundamentals.sqlite3')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS overview ("
+            "symbol TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._memory: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+    
+    async def get_overview(self, symbol: str, priority: Optional[Priority] = None) -> Dict[str, Any]:
+        """Return the OVERVIEW payload for a symbol, fetching it only when stale"""
+        symbol = symbol.upper()
+        cached = self._read(symbol)
+        if cached and time.time() - cached[1] < settings.FUNDAMENTALS_TTL:
+            return cached[0]
+        
+        try:
+            payload = await self.client.query('OVERVIEW', symbol=symbol, timeout=15, priority=priority)
+        except ServiceBusyError:
+            if cached:
+                return cached[0]
+            raise
+        except Exception as e:
+            if cached:
+                print(f"Error refreshing overview for {symbol}: {e}")
+                return cached[0]
+            raise
+        
+        if 'Symbol' in payload:
+            self._write(symbol, payload)
+        elif cached:
+            # Quota notes and empty answers should not replace good data
+            return cached[0]
+        return payload
+    
+    def get_cached(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Return whatever is stored for a symbol without touching the network"""
+        cached = self._read(symbol.upper())
+        return cached[0] if cached else None
+    
+    def age(self, symbol: str) -> Optional[float]:
+        """Seconds since the stored payload was fetched, or None if there is none"""
+        cached = self._read(symbol.upper())
+        return time.time() - cached[1] if cached else None
+    
+    def _read(self, symbol: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            if symbol in self._memory:
+                return self._memory[symbol]
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM overview WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = (json.loads(row[0]), row[1])
+            self._memory[symbol] = entry
+            return entry
+    
+    def _write(self, symbol: str, payload: Dict[str, Any]) -> None:
+        fetched_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO overview (symbol, payload, fetched_at) VALUES (?, ?, ?)",
+                (symbol, json.dumps(payload), fetched_at)
+            )
+            self._conn.commit()
+            self._memory[symbol] = (payload, fetched_at)
+
+
+fundamentals_cache = FundamentalsCache()
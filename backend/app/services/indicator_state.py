@@ -0,0 +1,195 @@
+import json
+import math
+import os
+import threading
+import numpy as np
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+from app.services.bar_store import BarStore, bar_store
+
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+
+
+class IndicatorState:
+    """
+    Running RSI and MACD for one bar series, updated in constant time per bar
+    
+    RSI keeps the last RSI_PERIOD gains/losses with running sums (the same
+    simple-average RSI as `features.calculate_rsi`); MACD keeps the fast, slow
+    and signal EMA values (pandas `ewm(adjust=False)` semantics). The state
+    before the latest bar is kept too, so a revised in-progress bar can be
+    replaced without replaying the series.
+    """
+    
+    def __init__(self):
+        self.first_date: Optional[str] = None
+        self.last_date: Optional[str] = None
+        self.core: Dict[str, Any] = self._empty_core()
+        self.previous: Optional[Dict[str, Any]] = None
+    
+    @staticmethod
+    def _empty_core() -> Dict[str, Any]:
+        return {
+            'count': 0,
+            'last_close': None,
+            'gains': [],
+            'losses': [],
+            'gain_sum': 0.0,
+            'loss_sum': 0.0,
+            'ema_fast': None,
+            'ema_slow': None,
+            'ema_signal': None,
+        }
+    
+    @staticmethod
+    def _copy(core: Dict[str, Any]) -> Dict[str, Any]:
+        copied = dict(core)
+        copied['gains'] = list(core['gains'])
+        copied['losses'] = list(core['losses'])
+        return copied
+    
+    @staticmethod
+    def _apply(core: Dict[str, Any], close: float) -> Dict[str, Any]:
+        """Return a new core with one more bar applied"""
+        core = IndicatorState._copy(core)
+        if core['last_close'] is not None:
+            delta = close - core['last_close']
+            gains = deque(core['gains'], maxlen=RSI_PERIOD)
+            losses = deque(core['losses'], maxlen=RSI_PERIOD)
+            if len(gains) == RSI_PERIOD:
+                core['gain_sum'] -= gains[0]
+                core['loss_sum'] -= losses[0]
+            gains.append(max(delta, 0.0))
+            losses.append(max(-delta, 0.0))
+            core['gain_sum'] += gains[-1]
+            core['loss_sum'] += losses[-1]
+            core['gains'], core['losses'] = list(gains), list(losses)
+        
+        def ema(previous: Optional[float], value: float, span: int) -> float:
+            alpha = 2 / (span + 1)
+            return value if previous is None else alpha * value + (1 - alpha) * previous
+        
+        core['ema_fast'] = ema(core['ema_fast'], close, MACD_FAST)
+        core['ema_slow'] = ema(core['ema_slow'], close, MACD_SLOW)
+        core['ema_signal'] = ema(core['ema_signal'], core['ema_fast'] - core['ema_slow'], MACD_SIGNAL)
+        core['last_close'] = close
+        core['count'] += 1
+        return core
+    
+    def update(self, date: str, close: float) -> None:
+        """Apply a bar; a bar for the latest date replaces that bar"""
+        if self.last_date is not None and date < self.last_date:
+            return
+        if date == self.last_date:
+            self.core = self._apply(self.previous or self._empty_core(), close)
+            return
+        self.previous = self.core
+        self.core = self._apply(self.core, close)
+        self.first_date = self.first_date or date
+        self.last_date = date
+    
+    @staticmethod
+    def _values(core: Dict[str, Any]) -> Dict[str, float]:
+        if len(core['gains']) < RSI_PERIOD:
+            rsi = math.nan
+        elif core['loss_sum'] <= 0:
+            rsi = 100.0 if core['gain_sum'] > 0 else math.nan
+        else:
+            rs = core['gain_sum'] / core['loss_sum']
+            rsi = 100 - (100 / (1 + rs))
+        
+        macd = (core['ema_fast'] or 0.0) - (core['ema_slow'] or 0.0)
+        signal = core['ema_signal'] or 0.0
+        return {'rsi': rsi, 'macd': macd, 'macd_signal': signal, 'macd_histogram': macd - signal}
+    
+    def values(self) -> Dict[str, float]:
+        """Indicator values as of the latest bar"""
+        return self._values(self.core)
+    
+    def peek(self, price: float) -> Dict[str, float]:
+        """Indicator values if the latest bar closed at `price` (e.g. a live quote)"""
+        base = self.previous if self.previous is not None else self.core
+        return self._values(self._apply(base, price))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'first_date': self.first_date,
+            'last_date': self.last_date,
+            'core': self.core,
+            'previous': self.previous,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IndicatorState':
+        state = cls()
+        state.first_date = data.get('first_date')
+        state.last_date = data.get('last_date')
+        state.core = data.get('core') or cls._empty_core()
+        state.previous = data.get('previous')
+        return state
+
+
+class IndicatorEngine:
+    """
+    Keeps an IndicatorState per symbol and interval in sync with the bar store
+    
+    States are persisted next to the bar files. Syncing only applies the bars
+    stored after the state's last date, so each new bar costs O(1).
+    """
+    
+    def __init__(self, store: BarStore = bar_store):
+        self.store = store
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._lock = threading.Lock()
+    
+    def _path(self, symbol: str, interval: str):
+        return self.store.root / f"{symbol.upper()}_{interval}.indicators.json"
+    
+    def get(self, symbol: str, interval: str = 'daily') -> Optional[IndicatorState]:
+        """Return the state synced with the stored bars, or None without bars"""
+        symbol = symbol.upper()
+        with self._lock:
+            bars = self.store.load(symbol, interval)
+            if len(bars) == 0:
+                return None
+            
+            state = self._states.get((symbol, interval)) or self._load(symbol, interval)
+            first_date = str(bars['date'][0])
+            if state is None or state.first_date is None or first_date < state.first_date:
+                # No state yet, or older bars were backfilled: replay everything once
+                state = IndicatorState()
+                start = 0
+            else:
+                last = np.datetime64(state.last_date, 's')
+                start = int(np.searchsorted(bars['date'], last, side='left'))
+            
+            # The latest bar is re-applied in case it was revised while in progress
+            changed = start < len(bars) - 1 or state.core['last_close'] != float(bars['close'][-1])
+            for date, close in zip(bars['date'][start:], bars['close'][start:]):
+                state.update(str(date), float(close))
+            
+            self._states[(symbol, interval)] = state
+            if changed:
+                self._save(symbol, interval, state)
+            return state
+    
+    def _load(self, symbol: str, interval: str) -> Optional[IndicatorState]:
+        path = self._path(symbol, interval)
+        if not path.exists():
+            return None
+        try:
+            return IndicatorState.from_dict(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            return None
+    
+    def _save(self, symbol: str, interval: str, state: IndicatorState) -> None:
+        path = self._path(symbol, interval)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(state.to_dict()))
+        os.replace(tmp_path, path)
+
+
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,180 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from typing import Any, Dict, List, Tuple
+
+# Bars kept per symbol when building a panel; enough to warm up every indicator
+PANEL_LOOKBACK = 250
+
+
+def build_panel(series: Dict[str, np.ndarray], lookback: int = PANEL_LOOKBACK) -> Dict[str, Any]:
+    """
+    Align stored bar series into 2-D arrays of shape (symbols, time)
+    
+    Columns follow the union of the most recent `lookback` dates. Gaps inside
+    a series are forward-filled; bars before a series starts are NaN.
+    """
+    symbols = [symbol for symbol, bars in series.items() if len(bars)]
+    if not symbols:
+        empty = np.empty((0, 0))
+        return {'symbols': [], 'dates': np.empty(0, dtype='datetime64[s]'), 'last_dates': [],
+                'open': empty, 'high': empty, 'low': empty, 'close': empty, 'volume': empty}
+    
+    dates = np.unique(np.concatenate([series[symbol]['date'][-lookback:] for symbol in symbols]))[-lookback:]
+    panel = {
+        'symbols': symbols,
+        'dates': dates,
+        'last_dates': [series[symbol]['date'][-1] for symbol in symbols],
+    }
+    for column in ['open', 'high', 'low', 'close', 'volume']:
+        panel[column] = np.full((len(symbols), len(dates)), np.nan)
+    
+    for row, symbol in enumerate(symbols):
+        bars = series[symbol]
+        bars = bars[bars['date'] >= dates[0]]
+        columns = np.searchsorted(dates, bars['date'])
+        for column in ['open', 'high', 'low', 'close', 'volume']:
+            panel[column][row, columns] = bars[column]
+    
+    for column in ['open', 'high', 'low', 'close']:
+        panel[column] = _ffill(panel[column])
+    # A missing bar traded nothing
+    panel['volume'] = np.where(np.isnan(panel['volume']) & ~np.isnan(panel['close']), 0, panel['volume'])
+    return panel
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs along the time axis"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = values[np.arange(values.shape[0])[:, None], index]
+    # Leading NaNs stay NaN: index 0 is only valid where the first value is
+    started = np.maximum.accumulate(valid, axis=1)
+    return np.where(started, filled, np.nan)
+
+
+def _rolling(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Apply `reducer` over trailing windows; the first window - 1 columns are NaN"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = reducer(sliding_window_view(values, window, axis=1), axis=-1)
+    return out
+
+
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; NaN until a full window of values is available"""
+    return _rolling(values, window, np.mean)
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Recursive average y[t] = alpha * x[t] + (1 - alpha) * y[t-1] along time
+    
+    Each row is seeded with its first valid value, like pandas
+    `ewm(adjust=False)`, so the leading NaNs of shorter series are skipped.
+    """
+    started = np.maximum.accumulate(~np.isnan(values), axis=1)
+    first = np.argmax(started, axis=1)
+    seed = values[np.arange(values.shape[0]), first]
+    # Leading NaNs take the seed value, which leaves the recursion unchanged
+    x = np.where(started, values, seed[:, None])
+    x = np.nan_to_num(x)
+    y, _ = lfilter([alpha], [1, alpha - 1], x, axis=1, zi=((1 - alpha) * np.nan_to_num(seed))[:, None])
+    return np.where(started, y, np.nan)
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average with pandas `ewm(span=span, adjust=False)` semantics"""
+    return _ewm(values, 2 / (span + 1))
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Relative Strength Index over simple averages of gains and losses"""
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    gain = sma(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0)), period)
+    loss = sma(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0)), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+def macd(
+    close: np.ndarray, fast: int = 12, slow: int = 26, signal_period: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    line = ema(close, fast) - ema(close, slow)
+    signal = ema(line, signal_period)
+    return line, signal, line - signal
+
+
+def bollinger_bands(
+    close: np.ndarray, window: int = 20, num_std: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Middle, upper and lower Bollinger Bands (sample standard deviation)"""
+    middle = sma(close, window)
+    std = _rolling(close, window, lambda w, axis: np.std(w, axis=axis, ddof=1))
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing"""
+    previous = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    return _ewm(true_range, 1 / period)
+
+
+def stochastic(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, k_period: int = 14, d_period: int = 3
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Stochastic oscillator %K and its %D moving average"""
+    highest = _rolling(high, k_period, np.max)
+    lowest = _rolling(low, k_period, np.min)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100 * (close - lowest) / (highest - lowest)
+    return k, sma(k, d_period)
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """On-Balance Volume, starting at zero on each series' first bar"""
+    direction = np.sign(np.nan_to_num(np.diff(close, axis=1, prepend=np.nan)))
+    flow = np.cumsum(direction * np.nan_to_num(volume), axis=1)
+    return np.where(np.isnan(close), np.nan, flow)
+
+
+def latest_indicators(panel: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Compute every indicator for the whole panel and return each symbol's latest values"""
+    close, high, low = panel['close'], panel['high'], panel['low']
+    if close.size == 0:
+        return []
+    
+    macd_line, macd_signal, macd_histogram = macd(close)
+    bb_middle, bb_upper, bb_lower = bollinger_bands(close)
+    stoch_k, stoch_d = stochastic(high, low, close)
+    columns = {
+        'close': close,
+        'rsi': rsi(close),
+        'macd': macd_line,
+        'macd_signal': macd_signal,
+        'macd_histogram': macd_histogram,
+        'sma_20': sma(close, 20),
+        'sma_50': sma(close, 50),
+        'ema_12': ema(close, 12),
+        'ema_26': ema(close, 26),
+        'bb_upper': bb_upper,
+        'bb_middle': bb_middle,
+        'bb_lower': bb_lower,
+        'atr': atr(high, low, close),
+        'stoch_k': stoch_k,
+        'stoch_d': stoch_d,
+        'obv': obv(close, panel['volume']),
+    }
+    latest = {name: values[:, -1] for name, values in columns.items()}
+    
+    rows = []
+    for row, symbol in enumerate(panel['symbols']):
+        values = {}
+        for name, column in latest.items():
+            value = float(column[row])
+            values[name] = round(value, 4) if np.isfinite(value) else None
+        rows.append({'symbol': symbol, 'date': str(panel['last_dates'][row].astype('datetime64[D]')), **values})
+    return rows
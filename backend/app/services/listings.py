@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.alpha_vantage_client import av_client
+from app.services.upstream_scheduler import Priority
+
+
+class ListingStore:
+    """
+    The universe of active US listings from Alpha Vantage LISTING_STATUS
+    
+    The CSV is downloaded at most once per LISTINGS_TTL and persisted to
+    `<DATA_DIR>/listings.json`, so restarts do not spend quota on it. A failed
+    refresh keeps serving the previous listing.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.client = av_client
+        self.path = Path(path or Path(settings.DATA_DIR) / 'listings.json')
+        self._listings: Optional[List[Dict[str, str]]] = None
+        self._fetched_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+        self._load()
+    
+    @property
+    def fetched_at(self) -> float:
+        return self._fetched_at
+    
+    def cached(self) -> List[Dict[str, str]]:
+        """Listings held locally, without touching the network"""
+        return self._listings or []
+    
+    async def get(self, priority: Optional[Priority] = Priority.BACKGROUND) -> List[Dict[str, str]]:
+        """Return active listings (`symbol`, `name`, `exchange`, `assetType`), refreshing when stale"""
+        if self._listings is not None and time.time() - self._fetched_at < settings.LISTINGS_TTL:
+            return self._listings
+        
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._download(priority))
+        try:
+            await asyncio.shield(self._refresh)
+        except Exception as e:
+            if self._listings is None:
+                raise
+            print(f"Error refreshing listings: {e}")
+        return self._listings
+    
+    async def _download(self, priority: Optional[Priority]) -> None:
+        payload = await self.client.query('LISTING_STATUS', priority=priority)
+        listings = [
+            {
+                'symbol': row.get('symbol', '').strip().upper(),
+                'name': row.get('name', '').strip(),
+                'exchange': row.get('exchange', '').strip(),
+                'assetType': row.get('assetType', '').strip(),
+            }
+            for row in payload.get('data', [])
+            if row.get('symbol') and row.get('status', 'Active') == 'Active'
+        ]
+        if not listings:
+            raise ValueError("Empty LISTING_STATUS response")
+        
+        self._listings = listings
+        self._fetched_at = time.time()
+        self._save()
+    
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        self._listings = data.get('listings')
+        self._fetched_at = data.get('fetched_at', 0.0)
+    
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'fetched_at': self._fetched_at, 'listings': self._listings}))
+        os.replace(tmp_path, self.path)
+
+
+listing_store = ListingStore()
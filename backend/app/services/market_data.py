@@ -0,0 +1,168 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+
+class MarketDataProvider(ABC):
+    """Common interface for market data sources used by the stocks API"""
+    
+    name: str = "provider"
+    
+    @abstractmethod
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        """Search for stocks by symbol or name"""
+    
+    @abstractmethod
+    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+        """Get detailed information about a stock"""
+    
+    @abstractmethod
+    async def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
+        """Get historical data for a stock"""
+    
+    @abstractmethod
+    async def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
+        """Get real-time quote for a stock"""
+    
+    async def get_stock_quotes(self, symbols: List[str]) -> Dict[str, Any]:
+        """Get quotes for many symbols concurrently, reporting failures per symbol"""
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        quotes, errors = await self._gather_quotes(symbols)
+        return {
+            'quotes': [quotes[symbol] for symbol in symbols if symbol in quotes],
+            'errors': errors
+        }
+    
+    async def _gather_quotes(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, str]]]:
+        semaphore = asyncio.Semaphore(settings.QUOTE_BATCH_CONCURRENCY)
+        
+        async def fetch(symbol: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.get_stock_quote(symbol)
+        
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+        quotes, errors = {}, []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors.append({'symbol': symbol, 'error': str(result) or type(result).__name__})
+            else:
+                quotes[symbol] = result
+        return quotes, errors
+
+class HedgedProvider(MarketDataProvider):
+    """
+    Sends each call to the primary provider and, if it has not answered within
+    its recent p95 latency, also to the secondary. The first successful,
+    non-empty answer wins and the slower call is cancelled; an empty answer
+    from the primary starts the secondary right away.
+    """
+    
+    HEDGED_METHODS = ('search_stocks', 'get_stock_info', 'get_stock_history', 'get_stock_quote')
+    
+    def __init__(self, primary: MarketDataProvider, secondary: MarketDataProvider):
+        self.primary = primary
+        self.secondary = secondary
+        self.name = f"{primary.name}+{secondary.name}"
+        self._latencies: Dict[str, Deque[float]] = {
+            method: deque(maxlen=settings.HEDGE_LATENCY_WINDOW) for method in self.HEDGED_METHODS
+        }
+    
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return await self._hedged('search_stocks', query)
+    
+    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+        return await self._hedged('get_stock_info', symbol)
+    
+    async def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
+        return await self._hedged('get_stock_history', symbol, period)
+    
+    async def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
+        return await self._hedged('get_stock_quote', symbol)
+    
+    async def get_stock_quotes(self, symbols: List[str]) -> Dict[str, Any]:
+        # Batches may use a bulk upstream call, so they stay on the primary
+        return await self.primary.get_stock_quotes(symbols)
+    
+    def hedge_delay(self, method: str) -> float:
+        """p95 of recent primary latencies, clamped to the configured bounds"""
+        samples = self._latencies[method]
+        if len(samples) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_MAX_DELAY
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return min(settings.HEDGE_MAX_DELAY, max(settings.HEDGE_MIN_DELAY, p95))
+    
+    async def _timed_primary(self, method: str, *args) -> Any:
+        start = time.monotonic()
+        try:
+            return await getattr(self.primary, method)(*args)
+        finally:
+            # Cancelled calls still count, otherwise the p95 would only see fast answers
+            self._latencies[method].append(time.monotonic() - start)
+    
+    async def _hedged(self, method: str, *args) -> Any:
+        primary = asyncio.ensure_future(self._timed_primary(method, *args))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay(method))
+        if done and primary.exception() is None and _answered(primary.result()):
+            return primary.result()
+        
+        secondary = asyncio.ensure_future(getattr(self.secondary, method)(*args))
+        pending = {secondary} if done else {primary, secondary}
+        error: Optional[BaseException] = None
+        # An empty answer only wins if neither provider has anything better
+        empty: Optional[List[Any]] = None
+        for task in ({primary} if done else ()):
+            error, empty = self._outcome(task, error, empty)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and _answered(task.result()):
+                        return task.result()
+                    error, empty = self._outcome(task, error, empty)
+            if empty is not None:
+                return empty[0]
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @staticmethod
+    def _outcome(
+        task: asyncio.Future, error: Optional[BaseException], empty: Optional[List[Any]]
+    ) -> Tuple[Optional[BaseException], Optional[List[Any]]]:
+        """Fold a finished call that did not answer into (first error, first empty result)"""
+        if task.exception() is not None:
+            return error or task.exception(), empty
+        return error, empty or [task.result()]
+
+
+def _answered(result: Any) -> bool:
+    """
+    Whether a provider result counts as an answer
+    
+    Providers report most lookup failures as an empty list or dict rather than
+    an exception, so an empty result must not win the hedge.
+    """
+    return not (isinstance(result, (list, dict)) and not result)
+
+def _create_provider(name: str) -> MarketDataProvider:
+    if name == 'alpha_vantage':
+        from app.services.alpha_vantage import AlphaVantageService
+        return AlphaVantageService()
+    if name == 'yahoo':
+        # yfinance is only imported when Yahoo is actually configured
+        from app.services.yahoo_finance import YahooFinanceService
+        return YahooFinanceService()
+    raise ValueError(f"Unknown market data provider: {name}")
+
+
+def get_market_data_provider() -> MarketDataProvider:
+    """Build the provider configured for this deployment"""
+    primary = _create_provider(settings.MARKET_DATA_PROVIDER)
+    if settings.MARKET_DATA_HEDGE_PROVIDER:
+        return HedgedProvider(primary, _create_provider(settings.MARKET_DATA_HEDGE_PROVIDER))
+    return primary
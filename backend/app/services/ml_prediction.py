@@ -1,317 +1,310 @@
+import asyncio
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import MODEL_FIT_SECONDS, MODEL_PREDICT_SECONDS, cache_collector
 from app.services.alpha_vantage import AlphaVantageService
-import warnings
-import logging
+from app.services.evaluation import DEFAULT_FOLDS, evaluator
+from app.services.fast_forecast import forecast_frame
+from app.services.features import build_feature_frame
+from app.services.forecasting import fit_prophet_forecast
+from app.services.indicator_state import indicator_engine
+from app.services.indicators import build_panel, latest_indicators
+from app.services.model_executor import model_executor
 
-# Suppress Prophet's plotly warning and other verbose logs
-warnings.filterwarnings('ignore')
-logging.getLogger('prophet').setLevel(logging.ERROR)
-logging.getLogger('cmdstanpy').setLevel(logging.ERROR)
-
-# Disable Stan backend to avoid compatibility issues
-import os
-os.environ['PROPHET_SUPPRESS_STAN_WARNINGS'] = '1'
-
-from prophet import Prophet
+# Longest horizon served; shorter ones are slices of the same forecast
+MAX_PREDICTION_DAYS = 30
 
 class MLPredictionService:
-    """Service for ML-based stock price prediction using Prophet"""
+    """Service for ML-based stock price prediction using Prophet
+    
+    Prophet fits run in the shared model process pool, never on the event loop.
+    """
     
     def __init__(self):
         self.av_service = AlphaVantageService()
-        self.cache = {}  # Simple in-memory cache
-        self.cache_duration = timedelta(hours=24)
+        self.model_executor = model_executor
+        self.indicators = indicator_engine
+        self.evaluator = evaluator
+        self.model_registry_root = str(Path(settings.DATA_DIR) / 'models')
+        self._forecasts_inflight: Dict[tuple, list] = {}
+        self.cache = LRUCache(
+            'ml_predictions',
+            max_entries=settings.ML_CACHE_MAX_ENTRIES,
+            max_bytes=settings.ML_CACHE_MAX_BYTES,
+            default_ttl=settings.ML_CACHE_TTL
+        )
+        cache_collector.register(self.cache)
     
-    def predict_stock_price(self, symbol: str, days: int = 7) -> Dict[str, Any]:
+    async def predict_stock_price(
+        self, symbol: str, days: int = 7, wait: bool = False, model: str = 'prophet'
+    ) -> Dict[str, Any]:
         """
-        Predict stock prices for the next N days using Prophet
+        Predict stock prices for the next N days
         
         Args:
             symbol: Stock symbol (e.g., 'AAPL')
             days: Number of days to predict (default: 7)
-            
+            wait: Wait for a free model worker instead of failing when busy
+            model: Forecasting engine, 'prophet' or one of FAST_ENGINES (see ForecastModel in app.api.predictions)
+        
         Returns:
             Dictionary with predictions, confidence intervals, and metadata
         """
-        cache_key = f"{symbol}_{days}"
+        cache_key = ('predict', symbol, days, model)
         
         # Check cache
-        if cache_key in self.cache:
-            cached_data, cached_time = self.cache[cache_key]
-            if datetime.now() - cached_time < self.cache_duration:
-                return cached_data
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            return self._with_accuracy(cached_data, model)
         
         try:
             # Get historical data (last 60 days for better predictions)
-            history = self.av_service.get_stock_history(symbol, period='3mo')
+            history = await self.av_service.get_stock_history(symbol, period='3mo')
             
             if not history or len(history) < 30:
                 raise ValueError(f"Insufficient data for {symbol}")
             
-            # Prepare data for Prophet
-            df = pd.DataFrame(history)
-            df['ds'] = pd.to_datetime(df['date'])
-            df['y'] = df['close']
-            df = df[['ds', 'y']].sort_values('ds')
-            
-            # Train Prophet model with simplified backend
-            model = Prophet(
-                daily_seasonality=True,
-                yearly_seasonality=False,
-                weekly_seasonality=True,
-                changepoint_prior_scale=0.05,  # More conservative
-                interval_width=0.95,  # 95% confidence interval
-                stan_backend=None  # Disable Stan backend
-            )
-            
-            # Suppress Prophet's verbose output during training
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                model.fit(df, algorithm='Newton')
-            
-            # Make future predictions
-            future = model.make_future_dataframe(periods=days)
-            forecast = model.predict(future)
-            
-            # Get predictions (only future dates)
-            predictions = forecast[forecast['ds'] > df['ds'].max()].copy()
-            
-            # Calculate trend
-            current_price = float(df['y'].iloc[-1])
-            predicted_price = float(predictions['yhat'].iloc[-1])
-            trend = 'up' if predicted_price > current_price else 'down'
-            change_percent = ((predicted_price - current_price) / current_price) * 100
-            
-            # Prepare prediction data
-            prediction_data = []
-            for _, row in predictions.iterrows():
-                prediction_data.append({
-                    'date': row['ds'].strftime('%Y-%m-%d'),
-                    'predicted_price': float(row['yhat']),
-                    'lower_bound': float(row['yhat_lower']),
-                    'upper_bound': float(row['yhat_upper']),
-                    'confidence': float((row['yhat_upper'] - row['yhat_lower']) / row['yhat'])
-                })
-            
-            # Calculate model confidence (inverse of uncertainty)
-            avg_uncertainty = predictions['yhat_upper'] - predictions['yhat_lower']
-            confidence_score = max(0, min(100, 100 - (avg_uncertainty.mean() / current_price * 100)))
-            
-            result = {
-                'symbol': symbol,
-                'current_price': current_price,
-                'predicted_price': predicted_price,
-                'trend': trend,
-                'change_percent': round(change_percent, 2),
-                'confidence_score': round(confidence_score, 2),
-                'predictions': prediction_data,
-                'days_predicted': days,
-                'timestamp': datetime.now().isoformat()
-            }
+            result = await self._predict_with_data(symbol, days, history, wait=wait, model=model)
             
             # Cache result
-            self.cache[cache_key] = (result, datetime.now())
-            
-            return result
+            self.cache.set(cache_key, result)
             
+            return self._with_accuracy(result, model)
+        
         except Exception as e:
             print(f"Error predicting {symbol}: {e}")
             raise
     
-    def get_technical_signals(self, symbol: str) -> Dict[str, Any]:
+    async def predict_many(self, symbols: List[str], days: int = 7) -> Dict[str, Any]:
         """
-        Calculate technical indicators and generate signals
+        Predict prices for many symbols at once
         
-        Returns:
-            Dictionary with RSI, MACD, signals, and recommendation
+        History is fetched concurrently and the fits are spread over all model
+        workers. Batch jobs wait for free workers rather than being rejected,
+        and failures are reported per symbol.
         """
-        try:
-            history = self.av_service.get_stock_history(symbol, period='3mo')
-            
-            if not history or len(history) < 30:
-                raise ValueError(f"Insufficient data for {symbol}")
-            
-            df = pd.DataFrame(history)
-            df = df.sort_values('date')
-            df['close'] = df['close'].astype(float)
-            
-            # Calculate RSI
-            rsi = self._calculate_rsi(df['close'], period=14)
-            current_rsi = float(rsi.iloc[-1]) if len(rsi) > 0 else 50
-            
-            # Calculate MACD
-            macd, signal, histogram = self._calculate_macd(df['close'])
-            current_macd = float(macd.iloc[-1]) if len(macd) > 0 else 0
-            current_signal = float(signal.iloc[-1]) if len(signal) > 0 else 0
-            current_histogram = float(histogram.iloc[-1]) if len(histogram) > 0 else 0
-            
-            # Generate signals
-            signals = []
-            
-            # RSI signals
-            if current_rsi < 30:
-                signals.append({'type': 'RSI', 'signal': 'OVERSOLD', 'strength': 'strong', 'action': 'BUY'})
-            elif current_rsi > 70:
-                signals.append({'type': 'RSI', 'signal': 'OVERBOUGHT', 'strength': 'strong', 'action': 'SELL'})
-            
-            # MACD signals
-            if current_histogram > 0 and current_macd > current_signal:
-                signals.append({'type': 'MACD', 'signal': 'BULLISH', 'strength': 'medium', 'action': 'BUY'})
-            elif current_histogram < 0 and current_macd < current_signal:
-                signals.append({'type': 'MACD', 'signal': 'BEARISH', 'strength': 'medium', 'action': 'SELL'})
-            
-            # Generate overall recommendation
-            buy_signals = sum(1 for s in signals if s['action'] == 'BUY')
-            sell_signals = sum(1 for s in signals if s['action'] == 'SELL')
-            
-            if buy_signals > sell_signals:
-                recommendation = 'BUY'
-                confidence = min(100, buy_signals * 40)
-            elif sell_signals > buy_signals:
-                recommendation = 'SELL'
-                confidence = min(100, sell_signals * 40)
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        results = await asyncio.gather(
+            *(self.predict_stock_price(symbol, days, wait=True) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        predictions, errors = [], []
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                errors.append({'symbol': symbol, 'error': str(result) or type(result).__name__})
             else:
-                recommendation = 'HOLD'
-                confidence = 50
-            
-            return {
-                'symbol': symbol,
-                'rsi': round(current_rsi, 2),
-                'macd': {
-                    'macd': round(current_macd, 2),
-                    'signal': round(current_signal, 2),
-                    'histogram': round(current_histogram, 2)
-                },
-                'signals': signals,
-                'recommendation': recommendation,
-                'confidence': confidence,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            print(f"Error calculating signals for {symbol}: {e}")
-            raise
+                predictions.append(result)
+        return {'predictions': predictions, 'errors': errors}
+    
+    async def get_indicators(self, symbols: List[str]) -> Dict[str, Any]:
+        """
+        Latest RSI, MACD, SMA/EMA, Bollinger, ATR, stochastic and OBV values
+        
+        Bars for all symbols are aligned into one (symbols, time) panel and
+        every indicator is computed in a single vectorized pass.
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        series, errors = await self.av_service.get_bars_many(symbols)
+        return {'indicators': latest_indicators(build_panel(series)), 'errors': errors}
+    
+    async def evaluate_accuracy(
+        self, symbol: str, model: str = 'prophet', folds: int = DEFAULT_FOLDS
+    ) -> Dict[str, Any]:
+        """
+        Run a walk-forward evaluation of `model` on the symbol's daily history
+        
+        Only folds not evaluated before are fitted, in parallel on the model
+        workers. The stored result is attached to later predictions.
+        """
+        bars = await self.av_service.get_bars(symbol, 'daily', full=True)
+        
+        async def submit(fn, *args):
+            return await self.model_executor.submit(fn, *args, wait=True)
+        
+        return await self.evaluator.evaluate(
+            symbol, bars, model, folds, submit=submit if model == 'prophet' else None
+        )
     
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate Relative Strength Index"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+    def get_accuracy(self, symbol: str, model: str = 'prophet') -> Dict[str, Any]:
+        """Latest stored walk-forward evaluation for a symbol"""
+        report = self.evaluator.load(symbol, model)
+        if report is None:
+            raise ValueError(f"No accuracy evaluation for {symbol} ({model})")
+        return report
     
-    def _calculate_macd(self, prices: pd.Series, fast: int = 12, slow: int = 26, signal_period: int = 9):
-        """Calculate MACD (Moving Average Convergence Divergence)"""
-        exp1 = prices.ewm(span=fast, adjust=False).mean()
-        exp2 = prices.ewm(span=slow, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=signal_period, adjust=False).mean()
-        histogram = macd - signal
-        return macd, signal, histogram
+    def _with_accuracy(self, prediction: Dict[str, Any], model: str) -> Dict[str, Any]:
+        """Attach the measured accuracy for the prediction's horizon, if evaluated"""
+        accuracy = self.evaluator.accuracy_for(prediction['symbol'], model, prediction['days_predicted'])
+        return {**prediction, 'accuracy': accuracy}
+    
+    async def get_technical_signals(self, symbol: str, live: bool = False) -> Dict[str, Any]:
+        """
+        Calculate technical indicators and generate signals
+        
+        Args:
+            symbol: Stock symbol
+            live: Evaluate the indicators at the current quote instead of the last close
+        
+        Returns:
+            Dictionary with RSI, MACD, signals, and recommendation
+        """
+        cache_key = ('signals', symbol)
+        if not live:
+            cached_data = self.cache.get(cache_key)
+            if cached_data is not None:
+                return cached_data
+        
+        history = await self.av_service.get_stock_history(symbol, period='3mo')
+        
+        if not history or len(history) < 30:
+            raise ValueError(f"Insufficient data for {symbol}")
+        
+        if live:
+            quote = await self.av_service.get_stock_quote(symbol)
+            return self._calculate_signals_with_data(symbol, history, live_price=quote.get('price') or None)
+        
+        result = self._calculate_signals_with_data(symbol, history)
+        
+        # Signals move with every new bar, so they expire sooner than forecasts
+        self.cache.set(cache_key, result, ttl=settings.SIGNALS_CACHE_TTL)
+        
+        return result
     
-    def get_combined_analysis(self, symbol: str, prediction_days: int = 7) -> Dict[str, Any]:
+    async def get_combined_analysis(
+        self, symbol: str, prediction_days: int = 7, model: str = 'prophet'
+    ) -> Dict[str, Any]:
         """
         Get combined analysis: predictions + technical signals
         
         Returns:
             Comprehensive analysis with recommendation
         """
-        cache_key = f"{symbol}_{prediction_days}_combined"
+        cache_key = ('combined', symbol, prediction_days, model)
         
         # Check cache first
-        if cache_key in self.cache:
-            cached_data, cached_time = self.cache[cache_key]
-            if datetime.now() - cached_time < self.cache_duration:
-                return cached_data
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            return cached_data
         
         try:
             # OPTIMIZATION: Fetch historical data once and reuse
-            history = self.av_service.get_stock_history(symbol, period='3mo')
+            history = await self.av_service.get_stock_history(symbol, period='3mo')
             
             if not history or len(history) < 30:
                 raise ValueError(f"Insufficient data for {symbol}")
             
             # Get predictions (passing history to avoid refetch)
-            predictions = self._predict_with_data(symbol, prediction_days, history)
+            predictions = self._with_accuracy(
+                await self._predict_with_data(symbol, prediction_days, history, model=model), model
+            )
             
             # Get technical signals (using same history data)
             signals = self._calculate_signals_with_data(symbol, history)
             
-            # Combine recommendations
-            pred_action = 'BUY' if predictions['trend'] == 'up' else 'SELL'
-            tech_action = signals['recommendation']
-            
-            # Final recommendation logic
-            if pred_action == 'BUY' and tech_action in ['BUY', 'HOLD']:
-                final_recommendation = 'STRONG BUY'
-                final_confidence = min(100, (predictions['confidence_score'] + signals['confidence']) / 2 + 15)
-            elif pred_action == 'SELL' and tech_action in ['SELL', 'HOLD']:
-                final_recommendation = 'STRONG SELL'
-                final_confidence = min(100, (predictions['confidence_score'] + signals['confidence']) / 2 + 15)
-            elif pred_action == tech_action:
-                final_recommendation = pred_action
-                final_confidence = (predictions['confidence_score'] + signals['confidence']) / 2
-            else:
-                final_recommendation = 'HOLD'
-                final_confidence = 50
-            
             result = {
                 'symbol': symbol,
                 'analysis': {
                     'prediction': predictions,
                     'technical_signals': signals,
-                    'final_recommendation': final_recommendation,
-                    'final_confidence': round(final_confidence, 2),
-                    'reasons': self._generate_reasons(predictions, signals, final_recommendation)
+                    **self._combine(predictions, signals)
                 },
                 'timestamp': datetime.now().isoformat()
             }
             
             # Cache the combined result
-            self.cache[cache_key] = (result, datetime.now())
+            self.cache.set(cache_key, result)
             
             return result
-            
+        
         except Exception as e:
             print(f"Error in combined analysis for {symbol}: {e}")
             raise
     
-    def _predict_with_data(self, symbol: str, days: int, history: List[Dict]) -> Dict[str, Any]:
+    async def stream_combined_analysis(
+        self, symbol: str, prediction_days: int = 7, model: str = 'prophet'
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Combined analysis as it becomes available
+        
+        Yields ('signals', ...) as soon as the history is in, ('prediction', ...)
+        once the forecast is done and ('recommendation', ...) last. The full
+        result is cached exactly like `get_combined_analysis`.
+        """
+        cache_key = ('combined', symbol, prediction_days, model)
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            analysis = cached_data['analysis']
+            yield 'signals', analysis['technical_signals']
+            yield 'prediction', analysis['prediction']
+            yield 'recommendation', {
+                key: analysis[key] for key in ('final_recommendation', 'final_confidence', 'reasons')
+            }
+            return
+        
+        history = await self.av_service.get_stock_history(symbol, period='3mo')
+        if not history or len(history) < 30:
+            raise ValueError(f"Insufficient data for {symbol}")
+        
+        signals = self._calculate_signals_with_data(symbol, history)
+        yield 'signals', signals
+        
+        predictions = self._with_accuracy(
+            await self._predict_with_data(symbol, prediction_days, history, model=model), model
+        )
+        yield 'prediction', predictions
+        
+        combined = self._combine(predictions, signals)
+        self.cache.set(cache_key, {
+            'symbol': symbol,
+            'analysis': {'prediction': predictions, 'technical_signals': signals, **combined},
+            'timestamp': datetime.now().isoformat()
+        })
+        yield 'recommendation', combined
+    
+    def _combine(self, predictions: Dict[str, Any], signals: Dict[str, Any]) -> Dict[str, Any]:
+        """Final recommendation, confidence and reasons from a forecast and its signals"""
+        pred_action = 'BUY' if predictions['trend'] == 'up' else 'SELL'
+        tech_action = signals['recommendation']
+        
+        # Final recommendation logic
+        if pred_action == 'BUY' and tech_action in ['BUY', 'HOLD']:
+            final_recommendation = 'STRONG BUY'
+            final_confidence = min(100, (predictions['confidence_score'] + signals['confidence']) / 2 + 15)
+        elif pred_action == 'SELL' and tech_action in ['SELL', 'HOLD']:
+            final_recommendation = 'STRONG SELL'
+            final_confidence = min(100, (predictions['confidence_score'] + signals['confidence']) / 2 + 15)
+        elif pred_action == tech_action:
+            final_recommendation = pred_action
+            final_confidence = (predictions['confidence_score'] + signals['confidence']) / 2
+        else:
+            final_recommendation = 'HOLD'
+            final_confidence = 50
+        
+        return {
+            'final_recommendation': final_recommendation,
+            'final_confidence': round(final_confidence, 2),
+            'reasons': self._generate_reasons(predictions, signals, final_recommendation)
+        }
+    
+    async def _predict_with_data(
+        self, symbol: str, days: int, history: List[Dict], wait: bool = False, model: str = 'prophet'
+    ) -> Dict[str, Any]:
         """
         Predict stock prices using pre-fetched historical data
         """
         try:
-            # Prepare data for Prophet
-            df = pd.DataFrame(history)
-            df['ds'] = pd.to_datetime(df['date'])
-            df['y'] = df['close']
-            df = df[['ds', 'y']].sort_values('ds')
+            # Prophet only needs the ds/y columns of the shared frame
+            df = self._get_feature_frame(symbol, history)[['ds', 'y']]
             
-            # Train Prophet model with simplified backend
-            model = Prophet(
-                daily_seasonality=True,
-                yearly_seasonality=False,
-                weekly_seasonality=True,
-                changepoint_prior_scale=0.05,
-                interval_width=0.95,
-                stan_backend=None  # Disable Stan backend
-            )
-            
-            # Suppress Prophet's verbose output during training
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                model.fit(df, algorithm='Newton')
-            
-            # Make future predictions
-            future = model.make_future_dataframe(periods=days)
-            forecast = model.predict(future)
-            
-            # Get predictions (only future dates)
-            predictions = forecast[forecast['ds'] > df['ds'].max()].copy()
+            # One forecast per (symbol, last bar) serves every horizon
+            forecast = await self._get_forecast(symbol, df, wait=wait, model=model)
+            predictions = forecast.iloc[:days]
             
             # Calculate trend
             current_price = float(df['y'].iloc[-1])
@@ -345,29 +338,104 @@ class MLPredictionService:
                 'days_predicted': days,
                 'timestamp': datetime.now().isoformat()
             }
-            
+        
         except Exception as e:
             print(f"Error predicting {symbol}: {e}")
             raise
     
-    def _calculate_signals_with_data(self, symbol: str, history: List[Dict]) -> Dict[str, Any]:
+    def _get_feature_frame(self, symbol: str, history: List[Dict]) -> pd.DataFrame:
+        """Return the cached feature frame for (symbol, last bar), building it once"""
+        key = ('features', symbol, max(bar['date'] for bar in history))
+        frame = self.cache.get(key)
+        if frame is None:
+            frame = build_feature_frame(history)
+            self.cache.set(key, frame)
+        return frame
+    
+    async def _get_forecast(
+        self, symbol: str, df: pd.DataFrame, wait: bool = False, model: str = 'prophet'
+    ) -> pd.DataFrame:
+        """
+        Forecast MAX_PREDICTION_DAYS ahead, fitting at most once per (symbol, last bar)
+        
+        Concurrent Prophet requests for the same key share one fit. The fit is
+        only cancelled when every request waiting on it has gone away. The
+        shared fit always waits for a worker; a caller with `wait=False` that
+        would start a new fit is rejected up front when the workers are busy,
+        so a batch caller joining it never inherits that rejection.
+        """
+        key = ('forecast', model, symbol, df['ds'].max().strftime('%Y-%m-%d'))
+        forecast = self.cache.get(key)
+        if forecast is not None:
+            return forecast
+        
+        if model != 'prophet':
+            # Fast engines fit and forecast in one step; it is all counted as fit time
+            with MODEL_FIT_SECONDS.labels(model).time():
+                forecast = forecast_frame(model, df, MAX_PREDICTION_DAYS)
+            self.cache.set(key, forecast)
+            return forecast
+        
+        entry = self._forecasts_inflight.get(key)
+        if entry is None:
+            if not wait:
+                self.model_executor.check_available()
+            task = asyncio.ensure_future(self.model_executor.submit(
+                fit_prophet_forecast, df, MAX_PREDICTION_DAYS, symbol, self.model_registry_root, wait=True
+            ))
+            entry = self._forecasts_inflight[key] = [task, 0]
+            task.add_done_callback(lambda _: self._forecasts_inflight.pop(key, None))
+        
+        task = entry[0]
+        entry[1] += 1
+        try:
+            forecast = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
+        
+        if forecast.attrs.get('fit_seconds') is not None:
+            MODEL_FIT_SECONDS.labels(model).observe(forecast.attrs['fit_seconds'])
+        if forecast.attrs.get('predict_seconds') is not None:
+            MODEL_PREDICT_SECONDS.labels(model).observe(forecast.attrs['predict_seconds'])
+        self.cache.set(key, forecast)
+        return forecast
+    
+    def _indicator_values(
+        self, symbol: str, history: List[Dict], live_price: Optional[float] = None
+    ) -> Dict[str, float]:
+        """
+        Latest RSI/MACD values for `history`
+        
+        Read from the incremental indicator state when it covers the same last
+        bar (O(1), optionally at a live price); otherwise from the feature frame.
+        """
+        df = self._get_feature_frame(symbol, history)
+        if len(df) == 0:
+            return {'rsi': 50, 'macd': 0, 'macd_signal': 0, 'macd_histogram': 0}
+        
+        state = self.indicators.get(symbol)
+        if state is not None and np.datetime64(state.last_date) == np.datetime64(df['ds'].iloc[-1], 's'):
+            return state.peek(float(live_price)) if live_price else state.values()
+        
+        latest = df.iloc[-1]
+        return {column: float(latest[column]) for column in ['rsi', 'macd', 'macd_signal', 'macd_histogram']}
+    
+    def _calculate_signals_with_data(
+        self, symbol: str, history: List[Dict], live_price: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Calculate technical indicators using pre-fetched historical data
         """
         try:
-            df = pd.DataFrame(history)
-            df = df.sort_values('date')
-            df['close'] = df['close'].astype(float)
-            
-            # Calculate RSI
-            rsi = self._calculate_rsi(df['close'], period=14)
-            current_rsi = float(rsi.iloc[-1]) if len(rsi) > 0 else 50
-            
-            # Calculate MACD
-            macd, signal, histogram = self._calculate_macd(df['close'])
-            current_macd = float(macd.iloc[-1]) if len(macd) > 0 else 0
-            current_signal = float(signal.iloc[-1]) if len(signal) > 0 else 0
-            current_histogram = float(histogram.iloc[-1]) if len(histogram) > 0 else 0
+            values = self._indicator_values(symbol, history, live_price)
+            current_rsi = values['rsi']
+            current_macd = values['macd']
+            current_signal = values['macd_signal']
+            current_histogram = values['macd_histogram']
             
             # Generate signals
             signals = []
@@ -411,7 +479,7 @@ class MLPredictionService:
                 'confidence': confidence,
                 'timestamp': datetime.now().isoformat()
             }
-            
+        
         except Exception as e:
             print(f"Error calculating signals for {symbol}: {e}")
             raise
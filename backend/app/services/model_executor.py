@@ -0,0 +1,80 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+
+
+class ModelExecutor:
+    """
+    Process pool for CPU-bound model fitting
+    
+    At most `max_pending` jobs may be running or queued at once. Interactive
+    submissions beyond that are rejected with ServiceBusyError (503 +
+    Retry-After) instead of piling up; batch jobs can opt to wait for a slot.
+    Cancelling the awaiting coroutine drops the job if it has not started yet.
+    If a worker dies (OOM kill, segfault) the pool is replaced and the
+    affected jobs fail with ServiceBusyError so clients retry.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending, self.workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+    
+    def start(self) -> None:
+        if self._pool is None:
+            # Spawned workers do not inherit the event loop or open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            self._slots = asyncio.Semaphore(self.max_pending)
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._slots = None
+    
+    def check_available(self) -> None:
+        """Raise ServiceBusyError when a new job would have to queue for a slot"""
+        self.start()
+        if self._slots.locked():
+            raise ServiceBusyError("Model workers are busy, try again later", retry_after=settings.MODEL_RETRY_AFTER)
+    
+    async def submit(self, fn: Callable[..., Any], *args, wait: bool = False) -> Any:
+        """Run `fn(*args)` in a worker process and return its result"""
+        self.start()
+        if not wait:
+            self.check_available()
+        
+        async with self._slots:
+            self.pending += 1
+            pool = self._pool
+            try:
+                future = pool.submit(fn, *args)
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except BrokenProcessPool:
+                self._restart(pool)
+                raise ServiceBusyError("A model worker crashed, try again later", retry_after=settings.MODEL_RETRY_AFTER)
+            finally:
+                self.pending -= 1
+    
+    def _restart(self, pool: ProcessPoolExecutor) -> None:
+        # Every job on a broken pool fails at once; only the first one replaces it
+        if self._pool is pool:
+            print("Model worker pool broke, starting a new one")
+            self.shutdown()
+            self.start()
+
+
+model_executor = ModelExecutor(settings.MODEL_WORKERS, settings.MODEL_MAX_PENDING)
@@ -0,0 +1,68 @@
+"""
+On-disk registry of fitted Prophet models
+
+Models are stored as `<root>/<SYMBOL>/<last training bar date>.json`, so any
+worker process (or a restarted server) can load them without refitting.
+"""
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class ModelRegistry:
+    """Versioned per-symbol store of serialized Prophet models"""
+    
+    def __init__(self, root: str, keep: int = 3):
+        self.root = Path(root)
+        self.keep = keep
+    
+    def _symbol_dir(self, symbol: str) -> Path:
+        return self.root / symbol.upper()
+    
+    def versions(self, symbol: str) -> List[str]:
+        """Stored versions for a symbol, oldest first"""
+        directory = self._symbol_dir(symbol)
+        if not directory.exists():
+            return []
+        return sorted(path.stem for path in directory.glob('*.json'))
+    
+    def load(self, symbol: str, version: Optional[str] = None) -> Optional[Any]:
+        """Load a specific version, or the latest one when `version` is None"""
+        from prophet.serialize import model_from_json
+        
+        if version is None:
+            versions = self.versions(symbol)
+            if not versions:
+                return None
+            version = versions[-1]
+        path = self._symbol_dir(symbol) / f"{version}.json"
+        if not path.exists():
+            return None
+        try:
+            return model_from_json(path.read_text())
+        except Exception as e:
+            print(f"Error loading model {symbol}@{version}: {e}")
+            return None
+    
+    def save(self, symbol: str, version: str, model: Any) -> None:
+        from prophet.serialize import model_to_json
+        
+        directory = self._symbol_dir(symbol)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{version}.json"
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(model_to_json(model))
+        os.replace(tmp_path, path)
+        
+        for old_version in self.versions(symbol)[:-self.keep]:
+            (directory / f"{old_version}.json").unlink(missing_ok=True)
+
+
+def warm_start_params(model: Any) -> Dict[str, Any]:
+    """Extract fitted parameters to initialise the next fit (Prophet `init`)"""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0]
+    return params
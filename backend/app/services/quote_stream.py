@@ -0,0 +1,135 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Set
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+from app.services.market_data import get_market_data_provider
+from app.services.upstream_scheduler import Priority, upstream_lane
+
+# Fields that change with every poll but carry no market information
+VOLATILE_FIELDS = {'timestamp'}
+
+
+class QuoteSubscriber:
+    """
+    One streaming client
+    
+    Updates are merged per symbol until the client reads them, so a slow
+    client only ever holds the latest state instead of a growing backlog.
+    """
+    
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+    
+    def push(self, symbol: str, fields: Dict[str, Any]) -> None:
+        self._pending.setdefault(symbol, {}).update(fields)
+        self._ready.set()
+    
+    def discard(self, symbol: str) -> None:
+        self.symbols.discard(symbol)
+        self._pending.pop(symbol, None)
+    
+    async def next(self) -> List[Dict[str, Any]]:
+        """Wait for updates: [{'symbol': ..., <changed fields>}, ...]"""
+        await self._ready.wait()
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return [{'symbol': symbol, **fields} for symbol, fields in pending.items()]
+
+
+class _Feed:
+    def __init__(self):
+        self.subscribers: Set[QuoteSubscriber] = set()
+        self.quote: Optional[Dict[str, Any]] = None
+        self.failed = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class QuoteHub:
+    """
+    Fans out live quotes to streaming clients
+    
+    Each symbol with at least one subscriber has exactly one poller, so
+    upstream GLOBAL_QUOTE calls scale with distinct symbols rather than with
+    connected clients. A new subscriber gets the latest full quote right away;
+    after that only the fields that changed are pushed. The poller stops when
+    the last subscriber of its symbol leaves.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.market = get_market_data_provider()
+        self._feeds: Dict[str, _Feed] = {}
+    
+    def subscribe(self, subscriber: QuoteSubscriber, symbols: Iterable[str]) -> None:
+        for symbol in {symbol.strip().upper() for symbol in symbols} - subscriber.symbols:
+            if not symbol:
+                continue
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                feed = self._feeds[symbol] = _Feed()
+                feed.task = asyncio.ensure_future(self._poll(symbol, feed))
+            feed.subscribers.add(subscriber)
+            subscriber.symbols.add(symbol)
+            if feed.quote is not None:
+                subscriber.push(symbol, feed.quote)
+    
+    def unsubscribe(self, subscriber: QuoteSubscriber, symbols: Optional[Iterable[str]] = None) -> None:
+        """Drop some (or, by default, all) of a subscriber's symbols"""
+        symbols = subscriber.symbols.copy() if symbols is None else {symbol.strip().upper() for symbol in symbols}
+        for symbol in symbols & subscriber.symbols:
+            subscriber.discard(symbol)
+            feed = self._feeds.get(symbol)
+            if feed is None:
+                continue
+            feed.subscribers.discard(subscriber)
+            if not feed.subscribers:
+                feed.task.cancel()
+                del self._feeds[symbol]
+    
+    def symbols(self) -> List[str]:
+        """Symbols currently being polled"""
+        return sorted(self._feeds)
+    
+    async def stop(self) -> None:
+        for feed in self._feeds.values():
+            feed.task.cancel()
+        self._feeds.clear()
+    
+    async def _poll(self, symbol: str, feed: _Feed) -> None:
+        while True:
+            delay = self.interval
+            try:
+                # Behind interactive requests, ahead of background refreshes
+                with upstream_lane(Priority.SCREENER):
+                    quote = await self.market.get_stock_quote(symbol)
+                self._publish(symbol, feed, quote)
+            except asyncio.CancelledError:
+                raise
+            except ServiceBusyError as e:
+                delay = max(delay, e.retry_after)
+            except Exception as e:
+                print(f"Error streaming quote for {symbol}: {e}")
+                feed.failed = True
+                for subscriber in feed.subscribers:
+                    subscriber.push(symbol, {'error': str(e)})
+            await asyncio.sleep(delay)
+    
+    def _publish(self, symbol: str, feed: _Feed, quote: Dict[str, Any]) -> None:
+        if feed.quote is None or feed.failed:
+            # First quote, or recovery after an error: send everything
+            changed = dict(quote, error=None) if feed.failed else dict(quote)
+        else:
+            changed = {
+                key: value for key, value in quote.items()
+                if key not in VOLATILE_FIELDS and feed.quote.get(key) != value
+            }
+        feed.quote, feed.failed = quote, False
+        if not changed:
+            return
+        for subscriber in feed.subscribers:
+            subscriber.push(symbol, changed)
+
+
+quote_hub = QuoteHub(settings.QUOTE_STREAM_INTERVAL)
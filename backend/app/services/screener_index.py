@@ -0,0 +1,234 @@
+import asyncio
+import time
+import numpy as np
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import SCREENER_SWEEP_SECONDS, timed
+from app.services.alpha_vantage import BULK_QUOTE_SIZE, AlphaVantageService
+from app.services.fundamentals import fundamentals_cache
+from app.services.listings import listing_store
+from app.services.screener_query import evaluate, order, parse_query, parse_sort
+from app.services.upstream_scheduler import Priority, background_budget, quota_interval, upstream_lane
+
+# Numeric columns and the OVERVIEW field each one comes from (None: quote or derived)
+NUMERIC_COLUMNS = {
+    'price': None,
+    'change': None,
+    'changePercent': None,
+    'volume': None,
+    'marketCap': 'MarketCapitalization',
+    'peRatio': 'TrailingPE',
+    'forwardPE': 'ForwardPE',
+    'pegRatio': 'PEGRatio',
+    'pbRatio': 'PriceToBookRatio',
+    'eps': 'EPS',
+    'beta': 'Beta',
+    'dividendYield': 'DividendYield',
+    'profitMargin': 'ProfitMargin',
+    'targetPrice': 'AnalystTargetPrice',
+    'upside': None,
+    'fiftyTwoWeekLow': '52WeekLow',
+    'fiftyTwoWeekHigh': '52WeekHigh',
+}
+TEXT_COLUMNS = ['symbol', 'name', 'exchange', 'sector', 'industry']
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(str(value).replace('%', ''))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class ScreenerIndex:
+    """
+    Market-wide screener over an in-memory columnar index
+    
+    Every active stock from LISTING_STATUS gets one row; fundamentals (from the
+    persistent OVERVIEW cache) and the latest quotes live in NumPy column
+    arrays, so any filter is a handful of vectorized comparisons.
+    
+    A background loop refreshes the index incrementally: the listing at most
+    daily, then the stalest symbols' quotes (in bulk when REALTIME_BULK_QUOTES
+    is available) and fundamentals. The batch per pass is capped, and the
+    interval stretched, so the loop stays within its share of the daily quota.
+    Columns are rebuilt off the event loop and swapped in whole.
+    """
+    
+    def __init__(self, interval: float, batch: int):
+        # A pass makes up to `batch` quote calls and `batch` overview calls
+        affordable = int(background_budget() * interval / 86400 / 2)
+        self.batch = max(1, min(batch, affordable))
+        self.interval = quota_interval(2 * self.batch, interval)
+        self.market = AlphaVantageService()
+        self.fundamentals = fundamentals_cache
+        self.listings = listing_store
+        self._quotes: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._rows: Dict[str, int] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._text: Dict[str, np.ndarray] = {}
+        self._display: Dict[str, np.ndarray] = {}
+        self._listed_at = None
+        self.updated_at: Optional[float] = None
+        self._loop_task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.ensure_future(self._run())
+    
+    async def stop(self) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+        self._loop_task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                with upstream_lane(Priority.BACKGROUND):
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error refreshing screener index: {e}")
+            await asyncio.sleep(self.interval)
+    
+    @timed(SCREENER_SWEEP_SECONDS, 'index')
+    async def refresh(self) -> None:
+        """One incremental pass: listing, then quotes, then fundamentals"""
+        listings = await self.listings.get()
+        if self._listed_at != self.listings.fetched_at or not self._rows:
+            await self._build([row for row in listings if row['assetType'] == 'Stock'])
+        
+        symbols = list(self._rows)
+        bulk = settings.ALPHA_VANTAGE_BULK_QUOTES
+        # A bulk call covers BULK_QUOTE_SIZE symbols
+        size = self.batch * BULK_QUOTE_SIZE if bulk else self.batch
+        stale = sorted(symbols, key=lambda symbol: self._quotes.get(symbol, ({}, 0.0))[1])[:size]
+        if stale:
+            # Never fall back to one call per symbol for a bulk-sized list
+            result = await self.market.get_stock_quotes(stale, fallback=not bulk)
+            now = time.time()
+            for quote in result['quotes']:
+                self._quotes[quote['symbol']] = (quote, now)
+            await self._update([quote['symbol'] for quote in result['quotes']])
+        
+        # Symbols never fetched come first, then the stalest expired ones
+        ages = {symbol: self.fundamentals.age(symbol) for symbol in symbols}
+        missing = [symbol for symbol, age in ages.items() if age is None]
+        expired = sorted(
+            (symbol for symbol, age in ages.items() if age is not None and age > settings.FUNDAMENTALS_TTL),
+            key=ages.get, reverse=True
+        )
+        missing = (missing + expired)[:self.batch]
+        if missing:
+            await asyncio.gather(
+                *(self.fundamentals.get_overview(symbol) for symbol in missing), return_exceptions=True
+            )
+            await self._update(missing)
+        self.updated_at = time.time()
+    
+    async def _build(self, listings: List[Dict[str, str]]) -> None:
+        """Lay out one row per listed stock, filled from whatever is cached"""
+        listed_at = self.listings.fetched_at
+        rows, numeric, display, text = await asyncio.to_thread(self._layout, listings)
+        self._rows, self._numeric, self._display, self._text = rows, numeric, display, text
+        self._listed_at = listed_at
+    
+    async def _update(self, symbols: List[str]) -> None:
+        """Rewrite the rows of `symbols` from the cached quote and overview"""
+        rows = self._rows
+        numeric, display, text = await asyncio.to_thread(
+            self._fill, rows, self._numeric, self._display, symbols
+        )
+        # A rebuild in the meantime already read the same caches
+        if rows is self._rows:
+            self._numeric, self._display, self._text = numeric, display, text
+    
+    def _layout(self, listings: List[Dict[str, str]]):
+        size = len(listings)
+        rows = {row['symbol']: i for i, row in enumerate(listings)}
+        numeric = {name: np.full(size, np.nan) for name in NUMERIC_COLUMNS}
+        display = {name: np.empty(size, dtype=object) for name in TEXT_COLUMNS}
+        for i, row in enumerate(listings):
+            display['symbol'][i] = row['symbol']
+            display['name'][i] = row['name']
+            display['exchange'][i] = row['exchange']
+        return (rows, *self._fill(rows, numeric, display, list(rows)))
+    
+    def _fill(self, rows: Dict[str, int], numeric: Dict[str, np.ndarray], display: Dict[str, np.ndarray], symbols):
+        """
+        Copies of the columns with the rows of `symbols` rewritten
+        
+        Runs in a worker thread; the columns being served are never modified.
+        """
+        numeric = {name: values.copy() for name, values in numeric.items()}
+        display = {name: values.copy() for name, values in display.items()}
+        for symbol in symbols:
+            i = rows.get(symbol)
+            if i is None:
+                continue
+            overview = self.fundamentals.get_cached(symbol) or {}
+            for name, field in NUMERIC_COLUMNS.items():
+                if field is not None:
+                    numeric[name][i] = _number(overview.get(field))
+            display['sector'][i] = overview.get('Sector') or ''
+            display['industry'][i] = overview.get('Industry') or ''
+            if overview.get('Name'):
+                display['name'][i] = overview['Name']
+            
+            quote = self._quotes.get(symbol, ({}, 0.0))[0]
+            for name in ('price', 'change', 'changePercent', 'volume'):
+                numeric[name][i] = _number(quote.get(name)) if quote.get('price') else np.nan
+            price, target = numeric['price'][i], numeric['targetPrice'][i]
+            numeric['upside'][i] = (target - price) / price * 100 if price > 0 and target > 0 else np.nan
+        
+        # Lower-cased copies for exact, case-insensitive string filters
+        text = {name: np.char.lower(values.astype(str)) for name, values in display.items()}
+        return numeric, display, text
+    
+    def query(
+        self, expression: str, sort: Optional[str] = None, limit: int = 50
+    ) -> Dict[str, Any]:
+        """
+        Filter and sort the index
+        
+        Raises QueryError (a ValueError) for malformed expressions.
+        """
+        started = time.perf_counter()
+        parsed = parse_query(expression or '')
+        size = len(self._rows)
+        mask = evaluate(parsed.where, self._numeric, self._text, size)
+        keys = tuple(parse_sort(sort)) if sort else parsed.sort
+        indices = order(np.flatnonzero(mask), keys, self._numeric, self._text)
+        limit = min(parsed.limit, limit) if parsed.limit is not None else limit
+        
+        stocks = []
+        for i in indices[:limit]:
+            stock = {name: self._display[name][i] or None for name in TEXT_COLUMNS}
+            for name in NUMERIC_COLUMNS:
+                value = self._numeric[name][i]
+                stock[name] = None if np.isnan(value) else round(float(value), 4)
+            stocks.append(stock)
+        
+        return {
+            'query': expression or '',
+            'stocks': stocks,
+            'count': int(len(indices)),
+            'total': size,
+            'updatedAt': datetime.fromtimestamp(self.updated_at).isoformat() if self.updated_at else None,
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 3),
+        }
+    
+    async def ensure_loaded(self) -> None:
+        """Build the index from local data on first use, without waiting on upstream"""
+        if self._rows:
+            return
+        listings = self.listings.cached()
+        if not listings:
+            with upstream_lane(Priority.SCREENER):
+                listings = await self.listings.get()
+        await self._build([row for row in listings if row['assetType'] == 'Stock'])
+
+
+screener_index = ScreenerIndex(settings.SCREENER_INDEX_REFRESH_INTERVAL, settings.SCREENER_INDEX_BATCH)
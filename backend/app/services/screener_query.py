@@ -0,0 +1,235 @@
+"""
+Filter/sort expressions for the screener index
+
+A query is a boolean filter over index columns plus optional `sort=` and
+`limit=` clauses, e.g.::
+
+    peRatio<20 & upside>15 & sector=="Technology" sort=-changePercent limit=20
+
+Comparisons are `<, <=, >, >=, ==, !=` (`=` is `==`) between a column and a
+number (with an optional K/M/B/T suffix), a quoted or bare string, or another
+numeric column. They combine with `&`/`and`, `|`/`or`, `!`/`not` and
+parentheses. Expressions are parsed into a small tree, never evaluated as
+Python, and each comparison becomes one vectorized NumPy mask.
+"""
+import operator
+import re
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class QueryError(ValueError):
+    """Raised for malformed screener queries"""
+
+
+class ScreenerQuery(NamedTuple):
+    where: Optional[tuple]
+    sort: Tuple[Tuple[str, bool], ...]  # (column, descending)
+    limit: Optional[int]
+
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)(?P<suffix>[kKmMbBtT](?![A-Za-z0-9_]))?
+      | (?P<string>"[^"]*"|'[^']*')
+      | (?P<op><=|>=|==|!=|<|>|=)
+      | (?P<logic>&&|&|\|\||\||!)
+      | (?P<paren>[()])
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+_CLAUSE = re.compile(r"\b(sort|limit)\s*=\s*(\S+)", re.IGNORECASE)
+_SUFFIXES = {'k': 1e3, 'm': 1e6, 'b': 1e9, 't': 1e12}
+_COMPARE = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+}
+_KEYWORDS = {'and': '&', 'or': '|', 'not': '!'}
+
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Unexpected input at position {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup if match.lastgroup != 'suffix' else 'number'
+        if kind == 'number':
+            value = float(match.group('number'))
+            if match.group('suffix'):
+                value *= _SUFFIXES[match.group('suffix').lower()]
+            tokens.append(('value', value))
+        elif kind == 'string':
+            tokens.append(('value', match.group('string')[1:-1]))
+        elif kind == 'op':
+            tokens.append(('op', '==' if match.group('op') == '=' else match.group('op')))
+        elif kind == 'logic':
+            tokens.append(('logic', match.group('logic')[0]))
+        elif kind == 'paren':
+            tokens.append(('paren', match.group('paren')))
+        elif match.group('name').lower() in _KEYWORDS:
+            tokens.append(('logic', _KEYWORDS[match.group('name').lower()]))
+        else:
+            tokens.append(('name', match.group('name')))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: or -> and -> not -> comparison | (or)"""
+    
+    def __init__(self, tokens: List[Tuple[str, Any]]):
+        self.tokens = tokens
+        self.position = 0
+    
+    def peek(self) -> Optional[Tuple[str, Any]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+    
+    def take(self) -> Tuple[str, Any]:
+        token = self.peek()
+        if token is None:
+            raise QueryError("Unexpected end of query")
+        self.position += 1
+        return token
+    
+    def parse(self) -> tuple:
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError(f"Unexpected {self.peek()[1]!r}")
+        return node
+    
+    def parse_or(self) -> tuple:
+        node = self.parse_and()
+        while self.peek() == ('logic', '|'):
+            self.take()
+            node = ('or', node, self.parse_and())
+        return node
+    
+    def parse_and(self) -> tuple:
+        node = self.parse_not()
+        while self.peek() == ('logic', '&'):
+            self.take()
+            node = ('and', node, self.parse_not())
+        return node
+    
+    def parse_not(self) -> tuple:
+        if self.peek() == ('logic', '!'):
+            self.take()
+            return ('not', self.parse_not())
+        if self.peek() == ('paren', '('):
+            self.take()
+            node = self.parse_or()
+            if self.take() != ('paren', ')'):
+                raise QueryError("Missing closing parenthesis")
+            return node
+        return self.parse_comparison()
+    
+    def parse_comparison(self) -> tuple:
+        kind, field = self.take()
+        if kind != 'name':
+            raise QueryError(f"Expected a column name, got {field!r}")
+        kind, op = self.take()
+        if kind != 'op':
+            raise QueryError(f"Expected a comparison after {field!r}")
+        kind, value = self.take()
+        if kind == 'name':
+            value = ('column', value)
+        elif kind != 'value':
+            raise QueryError(f"Expected a value after {field}{op}")
+        return ('cmp', field, op, value)
+
+
+@lru_cache(maxsize=256)
+def parse_query(text: str) -> ScreenerQuery:
+    """Parse a query string into its filter tree, sort keys and limit"""
+    sort: List[Tuple[str, bool]] = []
+    limit = None
+    for keyword, value in _CLAUSE.findall(text or ''):
+        if keyword.lower() == 'limit':
+            if not value.isdigit():
+                raise QueryError(f"Invalid limit {value!r}")
+            limit = int(value)
+        else:
+            sort.extend(parse_sort(value))
+    expression = _CLAUSE.sub(' ', text or '').strip()
+    where = _Parser(_tokenize(expression)).parse() if expression else None
+    return ScreenerQuery(where, tuple(sort), limit)
+
+
+def parse_sort(text: str) -> List[Tuple[str, bool]]:
+    """`-changePercent,peRatio` -> [('changePercent', True), ('peRatio', False)]"""
+    keys = []
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        descending = part.startswith('-')
+        name = part.lstrip('+-')
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name):
+            raise QueryError(f"Invalid sort key {part!r}")
+        keys.append((name, descending))
+    return keys
+
+
+def evaluate(node: Optional[tuple], numeric: Dict[str, np.ndarray], text: Dict[str, np.ndarray], size: int) -> np.ndarray:
+    """
+    Boolean mask of rows matching `node`
+    
+    `numeric` columns are float arrays with NaN for missing values, which never
+    match. `text` columns are lower-cased string arrays compared exactly.
+    """
+    if node is None:
+        return np.ones(size, dtype=bool)
+    kind = node[0]
+    if kind == 'and':
+        return evaluate(node[1], numeric, text, size) & evaluate(node[2], numeric, text, size)
+    if kind == 'or':
+        return evaluate(node[1], numeric, text, size) | evaluate(node[2], numeric, text, size)
+    if kind == 'not':
+        return ~evaluate(node[1], numeric, text, size)
+    
+    _, field, op, value = node
+    if field in text:
+        if op not in ('==', '!='):
+            raise QueryError(f"{field} only supports == and !=")
+        if isinstance(value, tuple):
+            value = value[1]
+        return _COMPARE[op](text[field], str(value).lower())
+    if field not in numeric:
+        raise QueryError(f"Unknown column {field!r}")
+    
+    if isinstance(value, tuple):
+        if value[1] not in numeric:
+            raise QueryError(f"Unknown numeric column {value[1]!r}")
+        other = numeric[value[1]]
+    elif isinstance(value, float):
+        other = value
+    else:
+        raise QueryError(f"{field} must be compared with a number")
+    
+    column = numeric[field]
+    with np.errstate(invalid='ignore'):
+        mask = _COMPARE[op](column, other)
+    # NaN != x is True; missing values should never match
+    return mask & ~np.isnan(column) & ~np.isnan(other)
+
+
+def order(
+    indices: np.ndarray, sort: Tuple[Tuple[str, bool], ...], numeric: Dict[str, np.ndarray], text: Dict[str, np.ndarray]
+) -> np.ndarray:
+    """Sort matching row indices by the sort keys; missing values go last"""
+    if not sort or len(indices) == 0:
+        return indices
+    keys = []
+    # np.lexsort uses the last key as the primary one
+    for field, descending in reversed(sort):
+        if field in numeric:
+            values = numeric[field][indices]
+            missing = np.isnan(values)
+            values = np.where(missing, 0.0, -values if descending else values)
+            keys.extend([values, missing])
+        elif field in text:
+            values = text[field][indices]
+            ranks = np.unique(values, return_inverse=True)[1]
+            keys.append(-ranks if descending else ranks)
+        else:
+            raise QueryError(f"Unknown sort column {field!r}")
+    return indices[np.lexsort(keys)]
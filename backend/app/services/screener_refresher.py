@@ -0,0 +1,97 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import SCREENER_SWEEP_SECONDS, timed
+from app.services.stock_screener import StockScreenerService
+from app.services.upstream_scheduler import Priority, quota_interval, upstream_lane
+
+
+class ScreenerRefresher:
+    """
+    Precomputes screener results in the background
+    
+    A loop started from the app lifespan recomputes every category each
+    SCREENER_REFRESH_INTERVAL seconds, stretched when needed so the sweeps fit
+    the daily upstream quota left after the interactive reserve. Readers
+    always get the latest snapshot straight from memory; a snapshot older
+    than SCREENER_REFRESH_INTERVAL triggers a revalidation in the background
+    (stale-while-revalidate), however long the loop sleeps. Only a cold start
+    waits.
+    """
+    
+    CATEGORIES = {
+        'undervalued': 'get_undervalued_stocks',
+        'gainers': 'get_top_gainers',
+        'losers': 'get_top_losers',
+    }
+    
+    def __init__(self, service: StockScreenerService, interval: float):
+        self.service = service
+        # Freshness of a snapshot on read
+        self.interval = interval
+        # The background loop's pace: a pass costs a quote and (at worst) an overview per symbol
+        self.sweep_interval = quota_interval(2 * len(service.DEFAULT_SYMBOLS), interval)
+        self._results: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.ensure_future(self._run())
+    
+    async def stop(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._loop_task = None
+        self._refresh_task = None
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh(Priority.BACKGROUND)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error refreshing screener: {e}")
+            await asyncio.sleep(self.sweep_interval)
+    
+    def refresh(self, lane: Priority = Priority.SCREENER) -> asyncio.Future:
+        """Start a refresh of every category unless one is already running"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(lane))
+        return asyncio.shield(self._refresh_task)
+    
+    @timed(SCREENER_SWEEP_SECONDS, 'snapshot')
+    async def _refresh(self, lane: Priority) -> None:
+        with upstream_lane(lane):
+            for category, method in self.CATEGORIES.items():
+                try:
+                    stocks = await getattr(self.service, method)()
+                    self._results[category] = (stocks, time.time())
+                except Exception as e:
+                    # Keep serving the previous snapshot
+                    print(f"Error computing {category}: {e}")
+    
+    async def get(self, category: str) -> Dict[str, Any]:
+        """Return the latest snapshot for a category along with its age"""
+        entry = self._results.get(category)
+        if entry is None:
+            await self.refresh()
+            entry = self._results.get(category, ([], time.time()))
+        elif time.time() - entry[1] > self.interval:
+            self.refresh()
+        
+        stocks, computed_at = entry
+        return {
+            'category': category,
+            'stocks': stocks,
+            'count': len(stocks),
+            'updatedAt': datetime.fromtimestamp(computed_at).isoformat(),
+            'ageSeconds': round(time.time() - computed_at, 1)
+        }
+
+
+screener_refresher = ScreenerRefresher(StockScreenerService(), settings.SCREENER_REFRESH_INTERVAL)
@@ -1,13 +1,23 @@
-from typing import List, Dict, Any
-import requests
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from app.core.config import settings
+from app.services.alpha_vantage import AlphaVantageService
+from app.services.alpha_vantage_client import av_client
+from app.services.fundamentals import fundamentals_cache
+from app.services.indicators import build_panel, latest_indicators
+from app.services.upstream_scheduler import Priority, upstream_lane
 
 class StockScreenerService:
     """Service for screening and filtering stocks"""
     
     def __init__(self):
-        self.api_key = settings.ALPHA_VANTAGE_API_KEY
-        self.base_url = "https://www.alphavantage.co/query"
+        self.client = av_client
+        self.fundamentals = fundamentals_cache
+        self.market = AlphaVantageService()
+        # Per-symbol quote/overview sweeps shared by all screener endpoints
+        self._snapshots: Dict[Tuple[str, ...], Tuple[Dict[str, Dict[str, Any]], float]] = {}
+        self._sweeps: Dict[Tuple[str, ...], asyncio.Task] = {}
     
     # Popular stock symbols to screen
     DEFAULT_SYMBOLS = [
@@ -16,23 +26,60 @@ class StockScreenerService:
         'PFE', 'JNJ', 'UNH', 'WMT', 'HD', 'NKE', 'INTC', 'AMD'
     ]
     
-    def get_undervalued_stocks(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
+    async def get_snapshot(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get quote and overview data for every symbol
+        
+        Results are reused for SCREENER_SNAPSHOT_TTL seconds, and concurrent
+        callers asking for the same universe share a single sweep.
+        """
+        key = tuple(symbols)
+        cached = self._snapshots.get(key)
+        if cached and time.monotonic() - cached[1] < settings.SCREENER_SNAPSHOT_TTL:
+            return cached[0]
+        
+        task = self._sweeps.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._sweep(symbols))
+            self._sweeps[key] = task
+            task.add_done_callback(lambda _: self._sweeps.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def _sweep(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quote and overview for all symbols with bounded concurrency"""
+        semaphore = asyncio.Semaphore(settings.SCREENER_CONCURRENCY)
+        
+        async def fetch(symbol: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    quote_data, overview = await asyncio.gather(
+                        self.client.query('GLOBAL_QUOTE', symbol=symbol, priority=Priority.SCREENER),
+                        self.fundamentals.get_overview(symbol, priority=Priority.SCREENER)
+                    )
+                    return {'quote': quote_data, 'overview': overview}
+                except Exception as e:
+                    print(f"Error fetching {symbol}: {e}")
+                    return None
+        
+        results = await asyncio.gather(*(fetch(symbol) for symbol in symbols))
+        snapshot = {symbol: data for symbol, data in zip(symbols, results) if data is not None}
+        self._snapshots[tuple(symbols)] = (snapshot, time.monotonic())
+        return snapshot
+    
+    async def get_undervalued_stocks(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
         """Get stocks that appear undervalued based on various metrics"""
         if symbols is None:
             symbols = self.DEFAULT_SYMBOLS
         
+        snapshot = await self.get_snapshot(symbols)
         undervalued_stocks = []
         
         for symbol in symbols:
+            if symbol not in snapshot:
+                continue
             try:
-                # Get overview data from Alpha Vantage
-                params = {
-                    'function': 'OVERVIEW',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                response = requests.get(self.base_url, params=params)
-                info = response.json()
+                info = snapshot[symbol]['overview']
+                quote_data = snapshot[symbol]['quote']
                 
                 if 'Symbol' not in info:
                     continue
@@ -44,15 +91,7 @@ class StockScreenerService:
                 current_price = float(info.get('AnalystTargetPrice', 0)) if info.get('AnalystTargetPrice') else 0
                 target_price = float(info.get('AnalystTargetPrice', 0)) if info.get('AnalystTargetPrice') else 0
                 
-                # Get quote for current price
-                quote_params = {
-                    'function': 'GLOBAL_QUOTE',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                quote_response = requests.get(self.base_url, params=quote_params)
-                quote_data = quote_response.json()
-                
+                # Use the quote for current price
                 if 'Global Quote' in quote_data and quote_data['Global Quote']:
                     current_price = float(quote_data['Global Quote'].get('05. price', 0))
                 
@@ -113,23 +152,19 @@ class StockScreenerService:
         
         return undervalued_stocks
     
-    def get_top_gainers(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
+    async def get_top_gainers(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
         """Get stocks with highest gains today"""
         if symbols is None:
             symbols = self.DEFAULT_SYMBOLS
         
+        snapshot = await self.get_snapshot(symbols)
         gainers = []
         
         for symbol in symbols:
+            if symbol not in snapshot:
+                continue
             try:
-                # Get quote data
-                quote_params = {
-                    'function': 'GLOBAL_QUOTE',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                quote_response = requests.get(self.base_url, params=quote_params)
-                quote_data = quote_response.json()
+                quote_data = snapshot[symbol]['quote']
                 
                 if 'Global Quote' not in quote_data or not quote_data['Global Quote']:
                     continue
@@ -139,13 +174,7 @@ class StockScreenerService:
                 
                 if change_percent > 0:
                     # Get market cap from overview
-                    overview_params = {
-                        'function': 'OVERVIEW',
-                        'symbol': symbol,
-                        'apikey': self.api_key
-                    }
-                    overview_response = requests.get(self.base_url, params=overview_params)
-                    overview = overview_response.json()
+                    overview = snapshot[symbol]['overview']
                     
                     stock_data = {
                         'symbol': symbol,
@@ -167,23 +196,19 @@ class StockScreenerService:
         
         return gainers[:10]  # Top 10
     
-    def get_top_losers(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
+    async def get_top_losers(self, symbols: List[str] = None) -> List[Dict[str, Any]]:
         """Get stocks with highest losses today"""
         if symbols is None:
             symbols = self.DEFAULT_SYMBOLS
         
+        snapshot = await self.get_snapshot(symbols)
         losers = []
         
         for symbol in symbols:
+            if symbol not in snapshot:
+                continue
             try:
-                # Get quote data
-                quote_params = {
-                    'function': 'GLOBAL_QUOTE',
-                    'symbol': symbol,
-                    'apikey': self.api_key
-                }
-                quote_response = requests.get(self.base_url, params=quote_params)
-                quote_data = quote_response.json()
+                quote_data = snapshot[symbol]['quote']
                 
                 if 'Global Quote' not in quote_data or not quote_data['Global Quote']:
                     continue
@@ -193,13 +218,7 @@ class StockScreenerService:
                 
                 if change_percent < 0:
                     # Get market cap from overview
-                    overview_params = {
-                        'function': 'OVERVIEW',
-                        'symbol': symbol,
-                        'apikey': self.api_key
-                    }
-                    overview_response = requests.get(self.base_url, params=overview_params)
-                    overview = overview_response.json()
+                    overview = snapshot[symbol]['overview']
                     
                     stock_data = {
                         'symbol': symbol,
@@ -220,3 +239,46 @@ class StockScreenerService:
         losers.sort(key=lambda x: x['changePercent'])
         
         return losers[:10]  # Top 10
+    
+    async def get_technical_screen(
+        self,
+        symbols: List[str] = None,
+        rsi_min: Optional[float] = None,
+        rsi_max: Optional[float] = None,
+        macd: Optional[str] = None,
+        bollinger: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter stocks on their latest technical indicators
+        
+        Indicators for the whole universe come from one vectorized pass over the
+        stored bars; symbols with missing values never match a filter on them.
+        
+        Args:
+            rsi_min / rsi_max: RSI bounds
+            macd: 'bullish' (histogram > 0) or 'bearish' (histogram < 0)
+            bollinger: 'above_upper' or 'below_lower' band
+        """
+        if symbols is None:
+            symbols = self.DEFAULT_SYMBOLS
+        
+        with upstream_lane(Priority.SCREENER):
+            series, _ = await self.market.get_bars_many(symbols)
+        rows = latest_indicators(build_panel(series))
+        
+        def matches(row: Dict[str, Any]) -> bool:
+            if rsi_min is not None and (row['rsi'] is None or row['rsi'] < rsi_min):
+                return False
+            if rsi_max is not None and (row['rsi'] is None or row['rsi'] > rsi_max):
+                return False
+            if macd is not None:
+                histogram = row['macd_histogram']
+                if histogram is None or (histogram <= 0 if macd == 'bullish' else histogram >= 0):
+                    return False
+            if bollinger == 'above_upper' and (row['bb_upper'] is None or row['close'] <= row['bb_upper']):
+                return False
+            if bollinger == 'below_lower' and (row['bb_lower'] is None or row['close'] >= row['bb_lower']):
+                return False
+            return True
+        
+        return [row for row in rows if matches(row)]
@@ -0,0 +1,264 @@
+import asyncio
+import bisect
+import json
+import os
+import re
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+from app.core.config import settings
+from app.services.listings import listing_store
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Longer words tolerate more typos
+MAX_DISTANCE = {0: 0, 1: 0, 2: 0, 3: 1, 4: 1, 5: 1}
+# Prefix matches expanded per query word
+PREFIX_WORDS = 200
+# Words scored by edit distance per fuzzy lookup
+FUZZY_CANDIDATES = 12
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"^{word}"
+    return {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+
+
+def _postings(trigrams: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    return {gram: np.asarray(positions, dtype=np.int32) for gram, positions in trigrams.items()}
+
+
+def _prefix_distance(word: str, key: str, limit: int) -> int:
+    """
+    Smallest optimal string alignment distance (edits plus adjacent
+    transpositions) between `word` and a prefix of `key` of length
+    len(word) - 1 to len(word) + 1
+    
+    One table serves all three prefixes: its last row holds the distance from
+    `word` to every prefix of `key`. Only the diagonal band of width `limit`
+    is computed, and any result above `limit` is reported as limit + 1.
+    """
+    key = key[:len(word) + 1]
+    over = limit + 1
+    previous2, previous = None, [j if j <= limit else over for j in range(len(key) + 1)]
+    for i in range(1, len(word) + 1):
+        current = [i if i <= limit else over] + [over] * len(key)
+        for j in range(max(1, i - limit), min(len(key), i + limit) + 1):
+            cost = word[i - 1] != key[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and word[i - 1] == key[j - 2] and word[i - 2] == key[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return over
+        previous2, previous = previous, current
+    return min(over, *previous[min(max(len(word) - 1, 0), len(key)):])
+
+
+class SymbolSearchIndex:
+    """
+    Local autocomplete over symbols and company names
+    
+    Built from the LISTING_STATUS universe and persisted to
+    `<DATA_DIR>/search_index.json`. Prefix lookups are binary searches over
+    sorted symbol and name-word keys; when a word has no prefix match, a
+    trigram index proposes candidates that are ranked by edit distance to the
+    typed prefix, so small typos still find the company.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.listings = listing_store
+        self.path = Path(path or Path(settings.DATA_DIR) / 'search_index.json')
+        self._built_from: Optional[float] = None
+        self._entries: List[Dict[str, str]] = []
+        self._tiebreak = np.zeros(0, dtype=np.int32)
+        self._word_lengths = np.zeros(0, dtype=np.int32)
+        self._symbol_keys: List[str] = []
+        self._symbol_ids: List[int] = []
+        self._word_keys: List[str] = []
+        self._word_ids: List[List[int]] = []
+        self._trigrams: Dict[str, np.ndarray] = {}
+        self._listing_task: Optional[asyncio.Task] = None
+        self._build_task: Optional[asyncio.Task] = None
+        self._load()
+    
+    def _ensure_current(self) -> None:
+        """
+        Start a rebuild when the listing has changed, or fetch it if missing
+        
+        Both run in the background; searches keep using the current index
+        until the new one is swapped in.
+        """
+        if not self.listings.cached():
+            if self._listing_task is None or self._listing_task.done():
+                self._listing_task = asyncio.ensure_future(self._fetch_listings())
+            return
+        if self._built_from != self.listings.fetched_at and (self._build_task is None or self._build_task.done()):
+            self._build_task = asyncio.ensure_future(self._rebuild())
+    
+    async def _fetch_listings(self) -> None:
+        try:
+            await self.listings.get()
+        except Exception as e:
+            print(f"Error loading listings for search: {e}")
+    
+    async def _rebuild(self) -> None:
+        fetched_at = self.listings.fetched_at
+        try:
+            data = await asyncio.to_thread(self._index, self.listings.cached(), fetched_at)
+            postings = await asyncio.to_thread(_postings, data['trigrams'])
+            self._swap(data, postings)
+            await asyncio.to_thread(self._save, data)
+        except Exception as e:
+            print(f"Error building search index: {e}")
+    
+    @staticmethod
+    def _index(listings: List[Dict[str, str]], fetched_at: float) -> Dict[str, Any]:
+        """Index structures for `listings`, in the persisted layout"""
+        entries = [
+            {'symbol': row['symbol'], 'name': row['name'], 'type': row['assetType'], 'exchange': row['exchange']}
+            for row in listings
+        ]
+        symbols = sorted((entry['symbol'].lower(), i) for i, entry in enumerate(entries))
+        # Order among equally ranked matches: stocks first, then shorter symbols
+        preferred = sorted(
+            range(len(entries)),
+            key=lambda i: (entries[i]['type'] != 'Stock', len(entries[i]['symbol']), entries[i]['symbol'])
+        )
+        tiebreak = [0] * len(entries)
+        for position, i in enumerate(preferred):
+            tiebreak[i] = position
+        
+        words: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            for word in set(_words(entry['name'])):
+                words.setdefault(word, []).append(i)
+        word_keys = sorted(words)
+        
+        trigrams: Dict[str, List[int]] = {}
+        for position, word in enumerate(word_keys):
+            for gram in _trigrams(word):
+                trigrams.setdefault(gram, []).append(position)
+        
+        return {
+            'built_from': fetched_at,
+            'entries': entries,
+            'tiebreak': tiebreak,
+            'symbol_keys': [key for key, _ in symbols],
+            'symbol_ids': [i for _, i in symbols],
+            'word_keys': word_keys,
+            'word_ids': [words[word] for word in word_keys],
+            'trigrams': trigrams,
+        }
+    
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Best matches for `query`, or [] when nothing local matches"""
+        self._ensure_current()
+        words = _words(query)
+        if not words or not self._entries:
+            return []
+        
+        # Rank: exact symbol, symbol prefix, name-word prefix, then fuzzy by distance
+        ranks: Dict[int, float] = {}
+        joined = ''.join(words)
+        for i in self._prefix(self._symbol_keys, self._symbol_ids, joined, limit * 20):
+            ranks[i] = 0 if self._entries[i]['symbol'].lower() == joined else 1
+        
+        matches: Optional[Dict[int, float]] = None
+        for word in words:
+            found = {i: 2.0 for i in self._word_prefix(word)}
+            if not found:
+                found = self._fuzzy(word)
+            matches = found if matches is None else {
+                i: max(rank, found[i]) for i, rank in matches.items() if i in found
+            }
+        for i, rank in (matches or {}).items():
+            ranks[i] = min(ranks.get(i, rank), rank)
+        
+        if not ranks:
+            return []
+        ids = np.fromiter(ranks.keys(), dtype=np.int64, count=len(ranks))
+        values = np.fromiter(ranks.values(), dtype=float, count=len(ranks))
+        ordered = ids[np.lexsort((self._tiebreak[ids], values))[:limit]]
+        return [dict(self._entries[i]) for i in ordered.tolist()]
+    
+    @staticmethod
+    def _prefix(keys: List[str], ids: List[Any], prefix: str, limit: int) -> List[Any]:
+        start = bisect.bisect_left(keys, prefix)
+        found = []
+        for position in range(start, min(start + limit, len(keys))):
+            if not keys[position].startswith(prefix):
+                break
+            found.append(ids[position])
+        return found
+    
+    def _word_prefix(self, prefix: str) -> Set[int]:
+        found: Set[int] = set()
+        for ids in self._prefix(self._word_keys, self._word_ids, prefix, PREFIX_WORDS):
+            found.update(ids)
+        return found
+    
+    def _fuzzy(self, word: str) -> Dict[int, float]:
+        """Entries whose name has a word within a few edits of `word` (as a prefix)"""
+        allowed = MAX_DISTANCE.get(len(word), 2)
+        if not allowed:
+            return {}
+        postings = [self._trigrams[gram] for gram in _trigrams(word) if gram in self._trigrams]
+        if not postings:
+            return {}
+        positions, counts = np.unique(np.concatenate(postings), return_counts=True)
+        
+        # Each edit destroys at most three trigrams, so closer words share more;
+        # only the best few candidates are scored
+        needed = max(1, len(_trigrams(word)) - 3 * allowed)
+        keep = counts >= needed
+        positions, counts = positions[keep], counts[keep]
+        # Ties on shared trigrams go to words of about the typed length
+        score = counts * 64 - np.minimum(np.abs(self._word_lengths[positions] - len(word)), 63)
+        if len(score) > FUZZY_CANDIDATES:
+            best = np.argpartition(-score, FUZZY_CANDIDATES)[:FUZZY_CANDIDATES]
+            positions, score = positions[best], score[best]
+        
+        scored = []
+        for position in positions[np.argsort(-score, kind='stable')].tolist():
+            distance = _prefix_distance(word, self._word_keys[position], allowed)
+            if distance <= allowed:
+                scored.append((distance, position))
+        
+        # Worst first, so an entry keeps the rank of its closest word
+        found: Dict[int, float] = {}
+        for distance, position in sorted(scored, reverse=True):
+            found.update(dict.fromkeys(self._word_ids[position], 3.0 + distance))
+        return found
+    
+    def _swap(self, data: Dict[str, Any], postings: Dict[str, np.ndarray]) -> None:
+        # Called on the event loop, so a search never sees half of each index
+        self._entries = data['entries']
+        self._tiebreak = np.asarray(data['tiebreak'], dtype=np.int32)
+        self._symbol_keys = data['symbol_keys']
+        self._symbol_ids = data['symbol_ids']
+        self._word_keys = data['word_keys']
+        self._word_ids = data['word_ids']
+        self._trigrams = postings
+        self._word_lengths = np.fromiter(map(len, self._word_keys), dtype=np.int32, count=len(self._word_keys))
+        self._built_from = data['built_from']
+    
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self._swap(data, _postings(data['trigrams']))
+        except (OSError, ValueError, KeyError):
+            return
+    
+    def _save(self, data: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, self.path)
+
+
+symbol_search = SymbolSearchIndex()
@@ -0,0 +1,188 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.errors import ServiceBusyError
+
+
+class Priority(IntEnum):
+    """Upstream lanes; lower values are served first"""
+    INTERACTIVE = 0
+    SCREENER = 1
+    BACKGROUND = 2
+
+
+_current_lane: ContextVar[Priority] = ContextVar('upstream_lane', default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def upstream_lane(priority: Priority):
+    """Run upstream calls made inside the block in `priority` or a lower lane"""
+    token = _current_lane.set(max(_current_lane.get(), priority))
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def background_budget() -> float:
+    """
+    Upstream calls per day each background loop may spend
+    
+    The daily quota minus the interactive reserve, split evenly between the
+    enabled background loops (screener precompute and screener index).
+    """
+    loops = max(1, int(settings.SCREENER_PRECOMPUTE) + int(settings.SCREENER_INDEX))
+    return settings.ALPHA_VANTAGE_CALLS_PER_DAY * (1 - settings.UPSTREAM_INTERACTIVE_RESERVE) / loops
+
+
+def quota_interval(calls_per_pass: float, interval: float) -> float:
+    """`interval`, stretched so a loop making `calls_per_pass` calls stays within its budget"""
+    budget = background_budget()
+    if budget <= 0:
+        return math.inf
+    return max(interval, 86400 * calls_per_pass / budget)
+
+
+class TokenBucket:
+    """Continuously refilling token bucket holding at most `capacity` tokens"""
+    
+    def __init__(self, capacity: int, period: float):
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now: float, tokens: float = 1.0) -> float:
+        """Seconds until `tokens` tokens are available"""
+        self._refill(now)
+        missing = tokens - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+    
+    def consume(self) -> None:
+        self.tokens -= 1
+
+
+class UpstreamScheduler:
+    """
+    Central gate for upstream API calls
+    
+    - Token buckets enforce the per-minute and per-day quota of the API key
+    - Identical in-flight requests share a single call (single-flight)
+    - Waiting calls are released in priority order, FIFO within a lane
+    - Lanes below INTERACTIVE cannot spend the reserved share of the daily
+      quota, so background work never locks users out for the day
+    """
+    
+    def __init__(self, per_minute: int, per_day: int, max_wait: float, interactive_reserve: float = 0.0):
+        self.buckets = [TokenBucket(per_minute, 60), TokenBucket(per_day, 86400)]
+        # Tokens each bucket keeps back from the non-interactive lanes
+        self.reserves = [0.0, math.floor(per_day * interactive_reserve)]
+        self.max_wait = max_wait
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def run(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        priority: Optional[Priority] = None
+    ) -> Any:
+        """Run `call` under the rate limit, joining an identical in-flight call if any"""
+        task = self._inflight.get(key)
+        if task is None:
+            lane = max(priority if priority is not None else Priority.INTERACTIVE, _current_lane.get())
+            task = asyncio.ensure_future(self._run(call, lane))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shield so one caller going away does not cancel the call for the others
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved when every caller has left
+    
+    async def _run(self, call: Callable[[], Awaitable[Any]], lane: Priority) -> Any:
+        await self._acquire(lane)
+        return await call()
+    
+    def _wait_time(self, now: float, lane: int, tokens: float = 1.0) -> float:
+        return max(
+            bucket.wait_time(now, tokens + (reserve if lane > Priority.INTERACTIVE else 0))
+            for bucket, reserve in zip(self.buckets, self.reserves)
+        )
+    
+    async def _acquire(self, lane: Priority) -> None:
+        now = time.monotonic()
+        # Only live waiters that will be served before this call count
+        queued = sum(
+            1 for waiter_lane, _, future in self._waiters
+            if waiter_lane <= lane and not future.done()
+        ) + 1
+        wait = self._wait_time(now, lane, queued)
+        if wait > self.max_wait:
+            raise ServiceBusyError("Upstream API quota exhausted, try again later", retry_after=math.ceil(wait))
+        
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(lane), next(self._seq), future))
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise ServiceBusyError("Upstream API is busy, try again later", retry_after=math.ceil(self.max_wait))
+    
+    def _dispatch(self) -> None:
+        """Hand out available tokens to the highest-priority waiters"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        while self._waiters:
+            lane, _, future = self._waiters[0]
+            if future.done():  # Cancelled or timed out while queued
+                heapq.heappop(self._waiters)
+                continue
+            
+            now = time.monotonic()
+            wait = self._wait_time(now, lane)
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            
+            for bucket in self.buckets:
+                bucket.consume()
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        for bucket in self.buckets:
+            bucket._refill(now)
+        return {
+            'tokens_minute': round(self.buckets[0].tokens, 2),
+            'tokens_day': round(self.buckets[1].tokens, 2),
+            'queued': len(self._waiters),
+            'inflight': len(self._inflight)
+        }
+
+
+upstream_scheduler = UpstreamScheduler(
+    per_minute=settings.ALPHA_VANTAGE_CALLS_PER_MINUTE,
+    per_day=settings.ALPHA_VANTAGE_CALLS_PER_DAY,
+    max_wait=settings.UPSTREAM_MAX_WAIT_SECONDS,
+    interactive_reserve=settings.UPSTREAM_INTERACTIVE_RESERVE
+)
@@ -1,15 +1,21 @@
+import asyncio
 import yfinance as yf
 from typing import List, Dict, Any
 from datetime import datetime
+from app.services.market_data import MarketDataProvider
 
-class YahooFinanceService:
-    """Service for interacting with Yahoo Finance API"""
+class YahooFinanceService(MarketDataProvider):
+    """Service for interacting with Yahoo Finance API
+
+    yfinance is blocking, so every call runs in a worker thread.
+    """
+    
+    name = "yahoo"
     
-    def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
         """Search for stocks by symbol or name"""
         try:
-            ticker = yf.Ticker(query.upper())
-            info = ticker.info
+            info = await self._ticker_info(query)
             
             if info and 'symbol' in info:
                 return [{
@@ -23,10 +29,9 @@ class YahooFinanceService:
             print(f"Error searching stocks: {e}")
             return []
     
-    def get_stock_info(self, symbol: str) -> Dict[str, Any]:
+    async def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get detailed information about a stock"""
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info
+        info = await self._ticker_info(symbol)
         
         return {
             "symbol": info.get('symbol', symbol.upper()),
@@ -55,10 +60,10 @@ class YahooFinanceService:
             "forwardPE": info.get('forwardPE', 0)
         }
     
-    def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
+    async def get_stock_history(self, symbol: str, period: str = "1mo") -> List[Dict[str, Any]]:
         """Get historical data for a stock"""
         ticker = yf.Ticker(symbol.upper())
-        hist = ticker.history(period=period)
+        hist = await asyncio.to_thread(ticker.history, period=period)
         
         data = []
         for index, row in hist.iterrows():
@@ -73,10 +78,9 @@ class YahooFinanceService:
         
         return data
     
-    def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
+    async def get_stock_quote(self, symbol: str) -> Dict[str, Any]:
         """Get real-time quote for a stock"""
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info
+        info = await self._ticker_info(symbol)
         
         return {
             "symbol": info.get('symbol', symbol.upper()),
@@ -92,3 +96,6 @@ class YahooFinanceService:
             "marketCap": info.get('marketCap', 0),
             "timestamp": datetime.now().isoformat()
         }
+    
+    async def _ticker_info(self, symbol: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(lambda: yf.Ticker(symbol.upper()).info)
@@ -29,6 +29,11 @@ export const stockApi = {
     const response = await api.get(`/api/stocks/quote/${symbol}`)
     return response.data
   },
+
+  getStockQuotes: async (symbols: string[]) => {
+    const response = await api.get(`/api/stocks/quotes?symbols=${symbols.join(',')}`)
+    return response.data
+  },
 }
 
 export const screenerApi = {
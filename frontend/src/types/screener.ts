@@ -34,10 +34,14 @@ export interface ScreenerResponse {
   category: string
   stocks: ScreenedStock[]
   count: number
+  updatedAt?: string
+  ageSeconds?: number
 }
 
 export interface TopMoversResponse {
   category: string
   stocks: TopMover[]
   count: number
+  updatedAt?: string
+  ageSeconds?: number
 }